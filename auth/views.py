@@ -1,5 +1,6 @@
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework import status
@@ -10,29 +11,41 @@ from django.contrib.auth.models import User
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.conf import settings
 
+# The outbox model lives in the housing app (auth/ is not an installed app)
+from housing import outbox
+from main import authentication
+from main.blacklist import BloomRefreshToken
+from main.throttling import IPTokenBucketThrottle
+
 
 class LogoutView(APIView):
     permission_classes = (AllowAny,)
     authentication_classes = ()
+    throttle_classes = (IPTokenBucketThrottle,)
+    throttle_scope = "auth"
     # For logout
     def post(self, request):
         try:
             refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
+            token = BloomRefreshToken(refresh_token)
             token.blacklist()
+            # Access tokens cached by main.authentication are verified again from now on
+            authentication.forget_user(token.payload.get(jwt_settings.USER_ID_CLAIM))
             return Response(status=status.HTTP_200_OK)
         except (ObjectDoesNotExist, TokenError):
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
 class PasswordRecoveryView(APIView):
-    # Accepts an email address and sends account recovery instructions.
+    # Accepts an email address and queues account recovery instructions.
 
     permission_classes = (AllowAny,)
     authentication_classes = ()
+    # Each request can queue an email, so this has its own, much lower rate
+    throttle_classes = (IPTokenBucketThrottle,)
+    throttle_scope = "recovery"
 
     def post(self, request):
         email = request.data.get("email")
@@ -65,15 +78,18 @@ class PasswordRecoveryView(APIView):
                     "Thanks,\nSlugNest"
                 )
 
-                # send_mail will use EMAIL_BACKEND from settings. In development it's console backend.
-                try:
-                    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False)
-                except Exception:
-                    # Don't leak internal email errors to the caller; log in a real app.
-                    pass
+                # Queued only; `manage.py send_outbox` delivers it through EMAIL_BACKEND,
+                # so a slow mail server never holds up this request.
+                outbox.enqueue(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
 
         # Always return a 200 to avoid revealing whether the email exists.
         return Response(
             {"detail": "If an account with that email exists, we've sent recovery instructions."},
             status=status.HTTP_200_OK,
-        )
\ No newline at end of file
+        )
+
+
+# djoser's JWT create endpoint (auth/jwt/create/), throttled per client IP
+class TokenCreateView(TokenObtainPairView):
+    throttle_classes = (IPTokenBucketThrottle,)
+    throttle_scope = "auth"
@@ -0,0 +1,13 @@
+"""
+Performance benchmarks for the SlugNest API.
+
+Each module is runnable from the project root, e.g.::
+
+    python -m benchmarks.serializers --rows 10000
+
+In-process benchmarks (serializers, querysets, db_connections, sqlite_concurrency)
+run against a throwaway test database (never db.sqlite3). The HTTP drivers
+(http_load, asgi_load) hit a running server; datagen fills its database.
+Benchmarks that take --json write results that benchmarks.compare can check
+against a stored baseline.
+"""
@@ -0,0 +1,29 @@
+import os
+
+
+def setup(test_db_name=None):
+    """
+    Configures Django and creates a throwaway, fully migrated test database.
+    SQLite test databases live in memory unless ``test_db_name`` names a file.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ALLOWED_HOSTS", "localhost,testserver")
+
+    import django
+    from django.conf import settings
+
+    if test_db_name:
+        settings.DATABASES["default"].setdefault("TEST", {})["NAME"] = test_db_name
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    django.setup()
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    return connection
+
+
+def teardown(connection, old_name=None):
+    connection.creation.destroy_test_db(old_name or connection.settings_dict["NAME"], verbosity=0)
@@ -0,0 +1,99 @@
+"""
+Minimal asyncio HTTP/1.1 keep-alive client used by the load drivers.
+
+The standard library has no async HTTP client, and the benchmarks shouldn't depend on
+one. This only speaks HTTP/1.1 with Content-Length bodies, which is all the API sends.
+"""
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+class Request:
+    __slots__ = ("method", "path", "body", "headers")
+
+    def __init__(self, path, method="GET", body=b"", headers=None):
+        self.method, self.path, self.body = method, path, body
+        self.headers = headers or {}
+
+
+async def fetch(reader, writer, host, request):
+    headers = {"Host": host, "Accept": "application/json", **request.headers}
+    if request.body:
+        headers["Content-Length"] = str(len(request.body))
+    head = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    writer.write(f"{request.method} {request.path} HTTP/1.1\r\n{head}\r\n".encode() + request.body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = None
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    if length is None:
+        raise RuntimeError(f"{request.path}: response has no Content-Length")
+    await reader.readexactly(length)
+    return status
+
+
+async def _worker(url, make_request, counter, total, timings, errors):
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    try:
+        while True:
+            n = next(counter)
+            if n >= total:
+                return
+            request = make_request(n)
+            start = time.perf_counter()
+            try:
+                status = await fetch(reader, writer, url.netloc, request)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Server closed the keep-alive connection; reconnect and count the failure
+                errors.append(n)
+                writer.close()
+                reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+                continue
+            timings.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors.append(n)
+    finally:
+        writer.close()
+
+
+async def run(base_url, make_request, concurrency, total):
+    """
+    Sends ``total`` requests, ``make_request(n)`` for n in range(total), over
+    ``concurrency`` keep-alive connections. Returns (latencies in ms, errors, seconds).
+    """
+    url = urlsplit(base_url)
+    counter = iter(range(total + concurrency))
+    timings, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(url, make_request, counter, total, timings, errors) for _ in range(concurrency)
+    ))
+    return timings, len(errors), time.perf_counter() - start
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(int(len(sorted_values) * fraction + 0.5) - 1, 0)]
+
+
+def summarize(timings, errors, elapsed):
+    timings = sorted(timings)
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "requests_per_s": round(len(timings) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.mean(timings), 2) if timings else 0.0,
+        "p50_ms": round(percentile(timings, 0.50), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+        "p99_ms": round(percentile(timings, 0.99), 2),
+    }
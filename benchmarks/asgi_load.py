@@ -0,0 +1,62 @@
+"""
+Throughput and latency of the read endpoints at high concurrency: the sync DRF views
+behind a WSGI server (main/wsgi.py) versus the async views in housing/async_views.py
+behind an ASGI server (main/asgi.py).
+
+Unlike the other benchmarks this one drives already running servers over HTTP, so
+start both against the same database first (see "Running under ASGI" in README.md):
+
+    gunicorn main.wsgi:application --workers 4 --threads 8 --bind 127.0.0.1:8000
+    uvicorn main.asgi:application --workers 4 --port 8001 --no-access-log
+    python -m benchmarks.asgi_load --wsgi http://127.0.0.1:8000 --asgi http://127.0.0.1:8001
+
+The ASGI server is measured twice: on the sync endpoints (each request still holds a
+thread) and on the /api/async/ endpoints. Every request gets a unique dummy query
+parameter so the listings response cache can't answer it (pass --allow-cache to keep
+cache hits).
+"""
+import argparse
+import asyncio
+
+from benchmarks._http import Request, run, summarize
+
+SYNC_PATHS = ["/api/listings/?page_size=24", "/api/listings/?page_size=24&min_beds=2&view=card"]
+
+
+def async_path(path):
+    return path.replace("/api/", "/api/async/", 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wsgi", help="Base URL of the WSGI server")
+    parser.add_argument("--asgi", help="Base URL of the ASGI server")
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--allow-cache", action="store_true")
+    args = parser.parse_args()
+    if not (args.wsgi or args.asgi):
+        parser.error("pass --wsgi and/or --asgi")
+
+    phases = []
+    if args.wsgi:
+        phases.append(("WSGI, sync views", args.wsgi, SYNC_PATHS))
+    if args.asgi:
+        phases.append(("ASGI, sync views", args.asgi, SYNC_PATHS))
+        phases.append(("ASGI, async views", args.asgi, [async_path(path) for path in SYNC_PATHS]))
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'':20} {'req/s':>8} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for label, base_url, paths in phases:
+        def make_request(n, paths=paths):
+            path = paths[n % len(paths)]
+            return Request(path if args.allow_cache else f"{path}&_={n}")
+        stats = summarize(*asyncio.run(run(base_url, make_request, args.concurrency, args.requests)))
+        print(
+            f"{label:20} {stats['requests_per_s']:8.0f} {stats['mean_ms']:9.1f} "
+            f"{stats['p50_ms']:8.1f} {stats['p99_ms']:8.1f} {stats['errors']:7d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
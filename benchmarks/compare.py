@@ -0,0 +1,75 @@
+"""
+Compares benchmark results against a stored baseline and flags regressions.
+
+Every benchmark that takes --json writes {case: {metric: value}}. Metrics ending in
+"_ms" and "errors" are lower-is-better, and "requests_per_s" is higher-is-better.
+Anything else, such as request counts, is ignored. A metric regresses when it is
+worse than the baseline by more than --tolerance (a fraction, default 0.10).
+
+    python -m benchmarks.http_load ... --json current.json
+    python -m benchmarks.compare baseline.json current.json --tolerance 0.15
+
+The exit status is 1 if anything regressed, so this can gate CI. Refresh the baseline
+by copying a trusted run over it.
+"""
+import argparse
+import json
+import sys
+
+
+def write_json(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def _direction(metric):
+    if metric.endswith("_ms") or metric == "errors":
+        return -1
+    if metric == "requests_per_s":
+        return 1
+    return 0
+
+
+def compare(baseline, current, tolerance=0.10):
+    """Returns (rows, regressed): one row per shared metric, and whether any regressed."""
+    rows, regressed = [], False
+    for case in sorted(baseline.keys() & current.keys()):
+        for metric in sorted(baseline[case].keys() & current[case].keys()):
+            direction = _direction(metric)
+            if not direction:
+                continue
+            old, new = baseline[case][metric], current[case][metric]
+            if old:
+                change = (new - old) / old
+            else:
+                change = 0.0 if new == old else float("inf")
+            worse = change * -direction > tolerance
+            regressed |= worse
+            rows.append((case, metric, old, new, change, worse))
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows, regressed = compare(baseline, current, args.tolerance)
+    for case, metric, old, new, change, worse in rows:
+        flag = "REGRESSION" if worse else ""
+        print(f"{case:40} {metric:15} {old:>10} -> {new:>10}  {change:+7.1%}  {flag}")
+    for case in sorted(baseline.keys() - current.keys()):
+        print(f"{case:40} missing from {args.current}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Synthetic House / User / SavedHouse data at a fixed scale.
+
+    python -m benchmarks.datagen --scale 100k --configured-db
+
+Scales: 1k, 100k and 1m listings, with one user per 10 listings and up to 10 saved
+listings per user. Data is deterministic for a given --seed. Every user's password
+is "benchpass" (usernames bench0, bench1, ...) so the HTTP load driver can log in.
+
+Without --configured-db the data goes into a throwaway test database and is thrown
+away again, which is only useful as a timing of the generator itself. Other
+benchmarks call ``generate()`` on their own test database. --configured-db fills the
+database in DATABASES["default"], for servers that the load driver hits.
+"""
+import argparse
+import random
+import time
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+PASSWORD = "benchpass"
+USERS_PER_LISTING = 0.1
+SAVES_PER_USER = 10
+
+STREETS = ["Mission St", "Bay St", "High St", "Pacific Ave", "Soquel Ave", "Water St", "Laurel St", "Ocean St"]
+WORDS = "sunny quiet spacious furnished cozy bright renovated shared private parking laundry garden".split()
+# Around Santa Cruz, CA
+CENTER_LAT, CENTER_LNG = 36.9741, -122.0308
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _houses(count, rng):
+    from housing import geo
+    from housing.models import House
+
+    for i in range(count):
+        lat = CENTER_LAT + rng.uniform(-0.08, 0.08)
+        lng = CENTER_LNG + rng.uniform(-0.08, 0.08)
+        yield House(
+            rent=rng.randrange(600, 4500, 25),
+            beds=rng.randint(0, 5),
+            baths=rng.randint(1, 3),
+            square_feet=rng.randrange(250, 2500, 10),
+            address=f"{i} {STREETS[i % len(STREETS)]}",
+            description=" ".join(rng.choices(WORDS, k=12)).capitalize() + ".",
+            latitude=lat,
+            longitude=lng,
+            geohash=geo.geohash_encode(lat, lng),
+        )
+
+
+def generate(scale="1k", seed=0, batch_size=5_000, log=print):
+    """Inserts listings, users and saved listings for ``scale``; returns row counts."""
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.db.models import Count, OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+
+    from housing import cache, search
+    from housing.models import House, SavedHouse
+
+    rng = random.Random(seed)
+    listings = SCALES[scale]
+    users = max(int(listings * USERS_PER_LISTING), 1)
+
+    started = time.perf_counter()
+    for batch in _batches(_houses(listings, rng), batch_size):
+        House.objects.bulk_create(batch)
+    log(f"  {listings} listings in {time.perf_counter() - started:.1f}s")
+
+    # One hash for everyone: hashing a password per user would dominate the run
+    password = make_password(PASSWORD)
+    started = time.perf_counter()
+    for batch in _batches(
+        (User(username=f"bench{i}", email=f"bench{i}@example.com", password=password) for i in range(users)),
+        batch_size,
+    ):
+        User.objects.bulk_create(batch)
+    log(f"  {users} users in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    oids = list(House.objects.order_by("oid").values_list("oid", flat=True)[:listings])
+    user_ids = list(User.objects.filter(username__startswith="bench").values_list("id", flat=True))
+    saves = (
+        SavedHouse(user_id=user_id, house_id=oids[index])
+        for user_id in user_ids
+        # Half uniform, half Pareto-distributed, so a few listings are far more popular
+        for index in {
+            rng.randrange(len(oids)) if k % 2 else int(rng.paretovariate(1.2) * 10) % len(oids)
+            for k in range(SAVES_PER_USER)
+        }
+    )
+    saved = 0
+    for batch in _batches(saves, batch_size):
+        SavedHouse.objects.bulk_create(batch, ignore_conflicts=True)
+        saved += len(batch)
+    counts = SavedHouse.objects.filter(house=OuterRef("pk")).order_by().values("house").annotate(n=Count("pk")).values("n")
+    House.objects.update(save_count=Coalesce(Subquery(counts), 0))
+    log(f"  {saved} saved listings in {time.perf_counter() - started:.1f}s")
+
+    # bulk_create skips the signals that keep these up to date
+    started = time.perf_counter()
+    search.rebuild_index()
+    cache.bump_version()
+    log(f"  search index in {time.perf_counter() - started:.1f}s")
+    return {"listings": listings, "users": users, "saved": saved}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--configured-db", action="store_true", help="Fill DATABASES['default'] instead of a test DB")
+    args = parser.parse_args()
+
+    if args.configured_db:
+        import os
+
+        import django
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+        django.setup()
+        connection = None
+    else:
+        from benchmarks._django import setup
+        connection = setup()
+
+    print(f"Generating scale {args.scale}:")
+    generate(args.scale, seed=args.seed, batch_size=args.batch_size)
+
+    if connection is not None:
+        from benchmarks._django import teardown
+        teardown(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Per-request latency of GET /api/listings/ with a new database connection per
+request, with persistent connections (CONN_MAX_AGE), and with the psycopg pool.
+
+Runs against the configured database: Postgres when USE_SQLITE=false (the pool
+phase runs when DB_POOL=true), otherwise a temporary SQLite file as a stand-in.
+
+    USE_SQLITE=false DB_NAME=... DB_POOL=true python -m benchmarks.db_connections
+    python -m benchmarks.db_connections --requests 500
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+
+def measure(client, requests):
+    from django.db import close_old_connections
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get("/api/listings/", {"page_size": 10})
+        # The test client skips this on purpose; a real WSGI/ASGI handler runs it
+        # at the end of every request, which is where CONN_MAX_AGE takes effect.
+        close_old_connections()
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+    timings.sort()
+    return statistics.mean(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp()
+    from benchmarks._django import setup, teardown
+    connection = setup(test_db_name=os.path.join(scratch, "bench.sqlite3"))
+
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+
+    from housing.models import House
+
+    House.objects.bulk_create(House(rent=1000 + i, address=f"{i} Bay St") for i in range(200))
+
+    settings_dict = connection.settings_dict
+    pool_options = settings_dict["OPTIONS"].pop("pool", None)
+    phases = [("new connection per request", 0, None), ("persistent (CONN_MAX_AGE=60)", 60, None)]
+    if pool_options:
+        phases.append(("psycopg pool", 0, pool_options))
+
+    print(f"{connection.vendor}, {args.requests} requests per phase")
+    # Bypass the listings response cache so every request reaches the database
+    with override_settings(LISTINGS_CACHE_TIMEOUT=0):
+        for name, max_age, pool in phases:
+            connection.close()
+            settings_dict["CONN_MAX_AGE"] = max_age
+            if pool:
+                settings_dict["OPTIONS"]["pool"] = pool
+            cache.clear()
+            client = Client()
+            measure(client, 20)  # warm up
+            mean, p50, p99 = measure(client, args.requests)
+            print(f"{name:>30}: mean {mean:6.2f} ms   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+            settings_dict["OPTIONS"].pop("pool", None)
+
+    connection.close()
+    teardown(connection)
+    shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
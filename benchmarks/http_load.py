@@ -0,0 +1,128 @@
+"""
+HTTP load driver for the REST API: several client processes, each with many
+keep-alive connections, hit one scenario at a time and report throughput and
+p50/p95/p99 latency as JSON.
+
+Like benchmarks.asgi_load it drives a running server. Fill its database with
+benchmarks.datagen first, so the bench users can log in. Also raise the auth
+throttle, or the login scenario measures 429s:
+
+    python -m benchmarks.datagen --scale 100k --configured-db
+    THROTTLE_AUTH_IP=1000000/min gunicorn main.wsgi:application --workers 4 --bind 127.0.0.1:8000
+    python -m benchmarks.http_load http://127.0.0.1:8000 --json current.json
+    python -m benchmarks.http_load http://127.0.0.1:8000 --baseline baseline.json
+
+Scenarios: listings, listings_filtered, listings_most_saved, listings_price_per_sqft,
+saved (as logged-in bench users), and jwt_create (POST /auth/jwt/create/). Listing requests get a unique dummy
+query parameter so the response cache can't answer them (pass --allow-cache to keep
+cache hits).
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import sys
+from multiprocessing import Pool
+from urllib.parse import urlsplit
+
+from benchmarks._http import Request, run, summarize
+from benchmarks.compare import compare, write_json
+from benchmarks.datagen import PASSWORD
+
+LISTING_PATHS = {
+    "listings": "/api/listings/?page_size=24",
+    "listings_filtered": "/api/listings/?page_size=24&min_rent=1000&max_rent=2000&min_beds=2",
+    "listings_most_saved": "/api/listings/?page_size=24&ordering=-save_count",
+    "listings_price_per_sqft": "/api/listings/?page_size=24&ordering=price_per_sqft",
+}
+SCENARIOS = [*LISTING_PATHS, "saved", "jwt_create"]
+
+
+def login(base_url, username):
+    url = urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80)
+    body = json.dumps({"username": username, "password": PASSWORD})
+    connection.request("POST", "/auth/jwt/create/", body, {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    data = json.loads(response.read() or b"{}")
+    if response.status != 200:
+        raise SystemExit(f"Logging in as {username} failed ({response.status}): {data}")
+    return data["access"]
+
+
+def request_factory(scenario, tokens, users, allow_cache):
+    if scenario in LISTING_PATHS:
+        path = LISTING_PATHS[scenario]
+        return lambda n: Request(path if allow_cache else f"{path}&_={n}")
+    if scenario == "saved":
+        return lambda n: Request(
+            "/api/saved/?page_size=24", headers={"Authorization": f"Bearer {tokens[n % len(tokens)]}"}
+        )
+    if scenario == "jwt_create":
+        return lambda n: Request(
+            "/auth/jwt/create/", method="POST", headers={"Content-Type": "application/json"},
+            body=json.dumps({"username": f"bench{n % users}", "password": PASSWORD}).encode(),
+        )
+    raise ValueError(scenario)
+
+
+def _client(job):
+    base_url, scenario, tokens, users, allow_cache, concurrency, total = job
+    make_request = request_factory(scenario, tokens, users, allow_cache)
+    return asyncio.run(run(base_url, make_request, concurrency, total))
+
+
+def load(base_url, scenario, tokens, args):
+    processes = min(args.processes, args.concurrency)
+    jobs = [
+        (base_url, scenario, tokens, args.users, args.allow_cache,
+         args.concurrency // processes + (i < args.concurrency % processes),
+         args.requests // processes + (i < args.requests % processes))
+        for i in range(processes)
+    ]
+    with Pool(processes) as pool:
+        parts = pool.map(_client, jobs)
+    timings = [ms for part_timings, _, _ in parts for ms in part_timings]
+    errors = sum(part_errors for _, part_errors, _ in parts)
+    # The client processes run side by side, so the slowest one bounds the wall time
+    return summarize(timings, errors, max(elapsed for _, _, elapsed in parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base_url")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Repeatable; default: all")
+    parser.add_argument("--requests", type=int, default=2000, help="Per scenario")
+    parser.add_argument("--concurrency", type=int, default=64, help="Open connections in total")
+    parser.add_argument("--processes", type=int, default=4, help="Client processes")
+    parser.add_argument("--users", type=int, default=10, help="Bench users to log in as")
+    parser.add_argument("--allow-cache", action="store_true")
+    parser.add_argument("--json", metavar="FILE", help="Write the results here instead of stdout")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare with these results (see benchmarks.compare)")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    scenarios = args.scenario or SCENARIOS
+    tokens = [login(args.base_url, f"bench{i}") for i in range(args.users)] if "saved" in scenarios else []
+
+    results = {}
+    for scenario in scenarios:
+        results[scenario] = load(args.base_url, scenario, tokens, args)
+        print(f"{scenario}: {results[scenario]}", file=sys.stderr)
+
+    if args.json:
+        write_json(args.json, results)
+    else:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows, regressed = compare(json.load(f), results, args.tolerance)
+        for case, metric, old, new, change, worse in rows:
+            if worse:
+                print(f"REGRESSION {case} {metric}: {old} -> {new} ({change:+.1%})", file=sys.stderr)
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmarks for the queries behind the listings and saved listings endpoints,
+on synthetic data (see benchmarks.datagen) in a throwaway test database.
+
+    python -m benchmarks.querysets --scale 100k --json querysets.json
+
+Each case fetches one page (25 rows) the way the API does; the time is the best of
+--repeat runs.
+"""
+import argparse
+
+from benchmarks.compare import write_json
+from benchmarks.serializers import best_of
+
+PAGE = 25
+
+
+def cases():
+    from django.contrib.auth.models import User
+    from django.db.models import Count, Max
+
+    from housing import fast_serializer, geo, search
+    from housing.models import House, SavedHouse
+
+    fields = fast_serializer.house_value_fields()
+    houses = House.objects.values(*fields)
+    middle_oid = House.objects.order_by("oid").values_list("oid", flat=True)[House.objects.count() // 2]
+    user = User.objects.filter(username__startswith="bench").order_by("id").first()
+    saved = SavedHouse.objects.filter(user=user).values(*fast_serializer.saved_house_value_fields())
+
+    return {
+        "listings first page": lambda: list(houses.order_by("-oid")[:PAGE + 1]),
+        "listings deep cursor page": lambda: list(houses.filter(oid__lt=middle_oid).order_by("-oid")[:PAGE + 1]),
+        "listings filtered": lambda: list(
+            houses.filter(rent__gte=1000, rent__lte=2000, beds__gte=2).order_by("-oid")[:PAGE + 1]
+        ),
+        "listings near": lambda: list(
+            geo.filter_near(House.objects.all(), 36.9741, -122.0308, 2).values(*fields).order_by("-oid")[:PAGE + 1]
+        ),
+        "listings most saved": lambda: list(houses.order_by("-save_count", "-oid")[:PAGE + 1]),
+        "listings cheapest": lambda: list(houses.order_by("rent", "oid")[:PAGE + 1]),
+        "listings price per sqft": lambda: list(
+            houses.filter(price_per_sqft__isnull=False).order_by("price_per_sqft", "oid")[:PAGE + 1]
+        ),
+        # List ETags come from the listings version with a shared cache and cost no query;
+        # with a per-process cache they fall back to this aggregate over the filtered rows
+        "listings etag fallback (per-process cache)": lambda: House.objects.filter(
+            rent__gte=1000, rent__lte=2000, beds__gte=2
+        ).aggregate(Max("updated_at"), Count("pk")),
+        "search": lambda: search.search_oids("sunny garden", limit=PAGE + 1, offset=0),
+        "saved first page": lambda: list(saved.order_by("-saved_at")[:PAGE + 1]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="1k", help="1k, 100k or 1m (see benchmarks.datagen)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", metavar="FILE", help="Also write the timings as JSON (see benchmarks.compare)")
+    args = parser.parse_args()
+
+    from benchmarks._django import setup, teardown
+    connection = setup()
+    from benchmarks.datagen import generate
+    print(f"Generating scale {args.scale}:")
+    generate(args.scale)
+
+    results = {}
+    print(f"best of {args.repeat}")
+    for name, query in cases().items():
+        best = best_of(args.repeat, query) * 1000
+        results[name] = {"best_ms": round(best, 3)}
+        print(f"{name:>28}: {best:8.2f} ms")
+    if args.json:
+        write_json(args.json, results)
+    teardown(connection)
+
+
+if __name__ == "__main__":
+    main()
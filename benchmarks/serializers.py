@@ -0,0 +1,92 @@
+"""
+Compares HouseSerializer / SavedHouseSerializer with the .values() fast path in
+housing/fast_serializer.py, including JSON rendering.
+
+    python -m benchmarks.serializers --rows 10000
+"""
+import argparse
+import time
+
+from benchmarks.compare import write_json
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", metavar="FILE", help="Also write the timings as JSON (see benchmarks.compare)")
+    args = parser.parse_args()
+
+    from benchmarks._django import setup
+    setup()
+
+    from django.contrib.auth.models import User
+    from rest_framework.renderers import JSONRenderer
+
+    from housing import fast_serializer
+    from housing.models import House, SavedHouse
+    from housing.serializer import HouseSerializer, SavedHouseSerializer
+
+    House.objects.bulk_create(
+        House(rent=900 + i % 2000, beds=i % 5, baths=i % 3, square_feet=400 + i % 1500,
+              address=f"{i} Mission St", description="Sunny room close to campus. " * 4)
+        for i in range(args.rows)
+    )
+    user = User.objects.create_user("bench", "bench@example.com", "pw")
+    SavedHouse.objects.bulk_create(SavedHouse(user=user, house=house) for house in House.objects.all())
+
+    renderer = JSONRenderer()
+    houses = House.objects.order_by("-oid")
+    saved = SavedHouse.objects.filter(user=user).order_by("-saved_at").select_related("house")
+    house_fields = fast_serializer.house_value_fields()
+    saved_fields = fast_serializer.saved_house_value_fields()
+
+    # "query+render" includes fetching the rows; "serialize" starts from rows already in memory
+    house_objs, house_rows = list(houses), list(houses.values(*house_fields))
+    saved_objs, saved_rows = list(saved), list(saved.values(*saved_fields))
+    cases = {
+        "houses query+render": (
+            lambda: renderer.render(HouseSerializer(list(houses), many=True).data),
+            lambda: renderer.render(fast_serializer.serialize_houses(houses.values(*house_fields))),
+        ),
+        "houses serialize": (
+            lambda: HouseSerializer(house_objs, many=True).data,
+            lambda: fast_serializer.serialize_houses(house_rows),
+        ),
+        "saved query+render": (
+            lambda: renderer.render(SavedHouseSerializer(list(saved), many=True).data),
+            lambda: renderer.render(fast_serializer.serialize_saved_houses(saved.values(*saved_fields))),
+        ),
+        "saved serialize": (
+            lambda: SavedHouseSerializer(saved_objs, many=True).data,
+            lambda: fast_serializer.serialize_saved_houses(saved_rows),
+        ),
+    }
+
+    def as_json(value):
+        return value if isinstance(value, bytes) else renderer.render(value)
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    results = {}
+    for name, (slow, fast) in cases.items():
+        assert as_json(slow()) == as_json(fast()), f"{name}: fast path output differs"
+        slow_time, fast_time = best_of(args.repeat, slow), best_of(args.repeat, fast)
+        print(f"{name:>20}: drf {slow_time * 1000:8.1f} ms   fast {fast_time * 1000:8.1f} ms   "
+              f"speedup {slow_time / fast_time:5.1f}x")
+        results[f"{name} drf"] = {"best_ms": round(slow_time * 1000, 3)}
+        results[f"{name} fast"] = {"best_ms": round(fast_time * 1000, 3)}
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
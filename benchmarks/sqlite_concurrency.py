@@ -0,0 +1,124 @@
+"""
+Many readers and one writer hammering a SQLite file, with and without the
+SQLITE_TUNING pragmas (WAL, synchronous=NORMAL, mmap, cache, busy_timeout).
+
+    python -m benchmarks.sqlite_concurrency --readers 16 --seconds 5
+
+Each configuration runs in its own subprocess (settings are read at start-up) and
+reports read/write throughput, read latency percentiles and lock errors.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def run_phase(readers, seconds):
+    scratch = tempfile.mkdtemp()
+    from benchmarks._django import setup, teardown
+    connection = setup(test_db_name=os.path.join(scratch, "bench.sqlite3"))
+
+    from django.db import OperationalError, connections
+
+    from housing.models import House
+    from housing.retry import is_lock_error, retry_on_db_lock
+
+    House.objects.bulk_create(House(rent=800 + i % 3000, address=f"{i} Bay St") for i in range(5000))
+    connection.close()
+
+    stop = threading.Event()
+    read_latencies, counters, lock = [], {"writes": 0, "read_lock_errors": 0, "write_lock_errors": 0}, threading.Lock()
+
+    @retry_on_db_lock(attempts=5)
+    def write(i):
+        House.objects.create(rent=1000 + i % 500, address=f"{i} New St", description="benchmark row")
+
+    def reader(n):
+        latencies, errors = [], 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                list(House.objects.filter(rent__gte=800 + n * 50).order_by("-oid")[:24])
+                latencies.append((time.perf_counter() - start) * 1000)
+            except OperationalError as error:
+                if not is_lock_error(error):
+                    raise
+                errors += 1
+        connections.close_all()
+        with lock:
+            read_latencies.extend(latencies)
+            counters["read_lock_errors"] += errors
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            try:
+                write(i)
+                counters["writes"] += 1
+            except OperationalError as error:
+                if not is_lock_error(error):
+                    raise
+                counters["write_lock_errors"] += 1
+            i += 1
+        connections.close_all()
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+    connection.close()
+    teardown(connection)
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    read_latencies.sort()
+    count = len(read_latencies)
+    return {
+        "journal_mode": journal_mode,
+        "reads_per_s": round(count / seconds, 1),
+        "writes_per_s": round(counters["writes"] / seconds, 1),
+        "read_p50_ms": round(read_latencies[count // 2], 2) if count else None,
+        "read_p99_ms": round(read_latencies[int(count * 0.99) - 1], 2) if count else None,
+        "read_lock_errors": counters["read_lock_errors"],
+        "write_lock_errors": counters["write_lock_errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--single", action="store_true", help="Run one phase with the current environment")
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_phase(args.readers, args.seconds)))
+        return
+
+    print(f"{args.readers} readers + 1 writer, {args.seconds}s per configuration")
+    for tuning in ("false", "true"):
+        env = dict(os.environ, USE_SQLITE="true", SQLITE_TUNING=tuning)
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_concurrency", "--single",
+             "--readers", str(args.readers), "--seconds", str(args.seconds)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        label = "tuned" if tuning == "true" else "default"
+        print(f"{label:>8}: " + "  ".join(f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
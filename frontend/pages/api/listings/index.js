@@ -4,11 +4,27 @@ export default async function handler(req, res) {
   try {
     switch (req.method) {
       case "GET":
-        const getResponse = await fetch(`${DJANGO_API_URL}/api/listings/`, {
+        // Forward pagination params (cursor, page_size) to Django
+        const query = new URLSearchParams(req.query).toString();
+        const headers = { "Content-Type": "application/json" };
+        // Pass the browser's cached ETag through so Django can answer 304
+        if (req.headers["if-none-match"]) {
+          headers["If-None-Match"] = req.headers["if-none-match"];
+        }
+        const getResponse = await fetch(`${DJANGO_API_URL}/api/listings/${query ? `?${query}` : ""}`, {
           method: "GET",
-          headers: { "Content-Type": "application/json" },
+          headers,
         });
 
+        const etag = getResponse.headers.get("etag");
+        if (etag) {
+          res.setHeader("ETag", etag);
+        }
+        if (getResponse.status === 304) {
+          res.status(304).end();
+          break;
+        }
+
         if (!getResponse.ok) {
           throw new Error(`Django API responded with status: ${getResponse.status}`);
         }
@@ -13,7 +13,9 @@ export default async function handler(req, res) {
     switch (req.method) {
       case "GET":
         // Get all saved listings for the user
-        const getResponse = await fetch(`${DJANGO_API_URL}/api/saved/`, {
+        // Forward pagination params (cursor, page_size) to Django
+        const query = new URLSearchParams(req.query).toString();
+        const getResponse = await fetch(`${DJANGO_API_URL}/api/saved/${query ? `?${query}` : ""}`, {
           method: "GET",
           headers: {
             "Authorization": `Bearer ${accessToken}`,
@@ -9,13 +9,13 @@ export default function Home() {
   useEffect(() => {
     async function loadFeatured() {
       try {
-        const response = await fetch("/api/listings/");
+        const response = await fetch("/api/listings/?page_size=6");
         if (!response.ok) {
           throw new Error("Failed to fetch data");
         }
         const data = await response.json();
         // For feature page, sort by id in descending order and show only the 6 newest listings
-        const sorted = data.sort((a, b) => b.oid - a.oid).slice(0, 6);
+        const sorted = data.results.sort((a, b) => b.oid - a.oid).slice(0, 6);
         setFeatured(sorted);
       } catch (error) {
         console.error(error);
@@ -3,9 +3,15 @@ import { useRouter } from "next/router";
 import ListingCard from "../components/Listing-card";
 import { useAuth } from "../contexts/AuthContext";
 
+// Django's "next" links point at Django itself; keep their query string (cursor,
+// page_size, ...) and send it through our own API routes instead
+const proxyUrl = (djangoUrl, route) => `${route}${new URL(djangoUrl).search}`;
+
 export default function ListingsPage() {
   const [houses, setHouses] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [savedIds, setSavedIds] = useState(() => new Set());
   const { isAuthenticated, getAuthHeaders } = useAuth();
@@ -16,15 +22,18 @@ export default function ListingsPage() {
 
     try {
       const headers = getAuthHeaders();
-      const response = await fetch("/api/saved", {
-        headers,
-      });
+      // Follow the cursor to the last page, or saves past the first page show as unsaved
+      const ids = new Set();
+      let url = "/api/saved?page_size=100";
+      while (url) {
+        const response = await fetch(url, { headers });
+        if (!response.ok) return;
 
-      if (response.ok) {
         const savedListings = await response.json();
-        const ids = new Set(savedListings.map((item) => item.house.oid));
-        setSavedIds(ids);
+        savedListings.results.forEach((item) => ids.add(item.house.oid));
+        url = savedListings.next ? proxyUrl(savedListings.next, "/api/saved") : null;
       }
+      setSavedIds(ids);
     } catch (err) {
       console.error("Error fetching saved listings:", err);
     }
@@ -77,6 +86,25 @@ export default function ListingsPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextUrl || isLoadingMore) return;
+
+    setIsLoadingMore(true);
+    try {
+      const response = await fetch(nextUrl);
+      if (!response.ok) {
+        throw new Error("Unable to load more listings. Please try again.");
+      }
+      const data = await response.json();
+      setHouses((prev) => [...prev, ...data.results]);
+      setNextUrl(data.next ? proxyUrl(data.next, "/api/listings/") : null);
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     let isMounted = true;
 
@@ -88,7 +116,8 @@ export default function ListingsPage() {
         }
         const data = await response.json();
         if (isMounted) {
-          setHouses(data);
+          setHouses(data.results);
+          setNextUrl(data.next ? proxyUrl(data.next, "/api/listings/") : null);
         }
       } catch (err) {
         if (isMounted) {
@@ -152,6 +181,19 @@ export default function ListingsPage() {
             />
           ))}
         </div>
+
+        {!isLoading && !error && nextUrl && (
+          <div className="mt-10 flex justify-center">
+            <button
+              type="button"
+              onClick={loadMore}
+              disabled={isLoadingMore}
+              className="rounded-full bg-amber-500 px-6 py-3 font-semibold text-white shadow-sm transition hover:bg-amber-600 disabled:opacity-60"
+            >
+              {isLoadingMore ? "Loading..." : "Load more listings"}
+            </button>
+          </div>
+        )}
       </section>
     </main>
   );
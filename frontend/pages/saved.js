@@ -4,6 +4,10 @@ import Link from "next/link";
 import ListingCard from "../components/Listing-card";
 import { useAuth } from "../contexts/AuthContext";
 
+// Django's "next" links point at Django itself; keep their query string (cursor,
+// page_size) and send it through our own API route instead
+const proxyUrl = (djangoUrl, route) => `${route}${new URL(djangoUrl).search}`;
+
 export default function SavedPage() {
   const [savedListings, setSavedListings] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
@@ -22,20 +26,25 @@ export default function SavedPage() {
     async function fetchSavedListings() {
       try {
         const headers = getAuthHeaders();
-        const response = await fetch("/api/saved", {
-          headers,
-        });
+        // Follow the cursor until the last page, so every saved listing is shown
+        const results = [];
+        let url = "/api/saved?page_size=100";
+        while (url) {
+          const response = await fetch(url, { headers });
 
-        if (!response.ok) {
-          if (response.status === 401) {
-            router.push("/login");
-            return;
+          if (!response.ok) {
+            if (response.status === 401) {
+              router.push("/login");
+              return;
+            }
+            throw new Error("Unable to load saved listings.");
           }
-          throw new Error("Unable to load saved listings.");
-        }
 
-        const data = await response.json();
-        setSavedListings(data);
+          const data = await response.json();
+          results.push(...data.results);
+          url = data.next ? proxyUrl(data.next, "/api/saved") : null;
+        }
+        setSavedListings(results);
       } catch (err) {
         setError(err.message);
       } finally {
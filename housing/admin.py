@@ -1,6 +1,12 @@
 from django.contrib import admin
-from .models import House
+from .models import House, OutboxEmail
 
 @admin.register(House)
 class HousingAdmin(admin.ModelAdmin):
-    fields = ['rent', 'beds', 'baths', 'square_feet', 'address', 'description', 'contact', 'More_information']
\ No newline at end of file
+    fields = ['rent', 'beds', 'baths', 'square_feet', 'address', 'description', 'contact', 'More_information']
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
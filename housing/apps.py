@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class HousingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "housing"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Connects the BlacklistedToken receiver in every process, not just those that refresh tokens
+        from main import blacklist  # noqa: F401
+        # Fail at startup, not with stale reads, if replicas lack a shared cache for their pins
+        from main import db_router
+        db_router.check_configuration()
@@ -0,0 +1,106 @@
+"""
+Async (ASGI) versions of the read-only listings and saved listings endpoints.
+
+DRF views are synchronous, so under ASGI each request to them holds a worker thread
+for its whole duration. These plain Django async views build the same querysets with
+the same filter backend, paginator and fast serializer as housing/views.py, but run
+the queries with the async ORM (``async for`` / ``aget``), so one worker can keep many
+slow requests in flight. The JSON is byte-identical to the sync endpoints; the
+response cache and ETag handling of GET /api/listings/ are not applied here.
+
+Mounted under /api/async/ (see housing/urls.py and "Running under ASGI" in README.md).
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from main.db_router import replica_reads
+from . import fast_serializer
+from .filters import ListingsFilterBackend
+from .models import House, SavedHouse
+from .pagination import ListingsCursorPagination, SavedCursorPagination
+from .serializer import HouseSerializer
+
+
+def _render(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def api_errors(view):
+    """Turns DRF exceptions raised by an async view into the same JSON errors DRF sends."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = _render(detail, exc.status_code)
+            if getattr(exc, 'auth_header', None):
+                response['WWW-Authenticate'] = exc.auth_header
+            return response
+    return wrapper
+
+
+async def _authenticate(request):
+    """Runs the (synchronous) DRF authenticators in a thread; 401 unless a user is found."""
+    try:
+        user = await sync_to_async(lambda: request.user)()
+        if not user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+    except (exceptions.NotAuthenticated, exceptions.AuthenticationFailed) as exc:
+        if request.authenticators:
+            exc.auth_header = request.authenticators[0].authenticate_header(request)
+        raise
+    return user
+
+
+# GET /api/async/listings/ - same parameters and response as GET /api/listings/
+@require_GET
+@api_errors
+async def listings_list(request):
+    request = Request(request)
+    fields = HouseSerializer.requested_fields(request.query_params)
+    paginator = ListingsCursorPagination()
+    with replica_reads(request):
+        # Filtering only builds the query; it runs below with the page
+        queryset = ListingsFilterBackend().filter_queryset(request, House.objects.all(), None)
+        # The paginator keys on its ordering columns, so fetch them even when they weren't requested
+        ordering = [name.lstrip('-') for name in paginator.get_ordering(request, queryset, None)]
+        rows = queryset.values(*{*ordering, *fast_serializer.house_value_fields(fields)})
+        page = await paginator.apaginate_queryset(rows, request)
+    return _render(paginator.get_paginated_response(fast_serializer.serialize_houses(page, fields)).data)
+
+
+# GET /api/async/listings/{id}/ - same as GET /api/listings/{id}/
+@require_GET
+@api_errors
+async def listing_detail(request, pk):
+    request = Request(request)
+    fields = HouseSerializer.requested_fields(request.query_params)
+    with replica_reads(request):
+        try:
+            row = await House.objects.values(*fast_serializer.house_value_fields(fields)).aget(oid=pk)
+        except House.DoesNotExist:
+            raise exceptions.NotFound('No House matches the given query.')
+    return _render(fast_serializer.serialize_houses([row], fields)[0])
+
+
+# GET /api/async/saved/ - same as GET /api/saved/ (auth required)
+@require_GET
+@api_errors
+async def saved_list(request):
+    request = Request(
+        request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    user = await _authenticate(request)
+    rows = SavedHouse.objects.filter(user=user).values(*fast_serializer.saved_house_value_fields())
+    paginator = SavedCursorPagination()
+    with replica_reads(request):
+        page = await paginator.apaginate_queryset(rows, request)
+    return _render(paginator.get_paginated_response(fast_serializer.serialize_saved_houses(page)).data)
@@ -0,0 +1,129 @@
+"""
+Versioned response cache for the listings API.
+
+Rendered JSON bytes for list/retrieve responses are stored under a key made of the
+global "listings version" and the request's absolute URL. Any House write bumps the
+version, which orphans every cached page at once; stale entries simply expire.
+Pages read from a replica are cached apart from pages read from the primary, and only
+briefly, so replication lag can't outlive the version bump (see main/db_router.py).
+Only Django's cache API is used, so LocMem and file-based caches both work.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from main import db_router
+
+
+VERSION_KEY = 'listings:version'
+MODIFIED_KEY = 'listings:modified'
+HITS_KEY = 'listings:cache:hits'
+MISSES_KEY = 'listings:cache:misses'
+
+
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Key is missing (first use, or evicted); start it at delta
+        cache.add(key, 0, None)
+        return cache.incr(key, delta)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock rather than 1, so a version key that was evicted can
+        # never come back as a number that older cached pages were stored under.
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    get_version()
+    cache.set(MODIFIED_KEY, int(time.time()), None)
+    return _incr(VERSION_KEY)
+
+
+def last_modified():
+    """Unix time of the latest version bump (now, if that was never recorded or was evicted)."""
+    cache.add(MODIFIED_KEY, int(time.time()), None)
+    return cache.get(MODIFIED_KEY)
+
+
+def stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+        'version': get_version(),
+    }
+
+
+def _url_hash(request):
+    # The whole URL, not just the path: cached bodies hold absolute next/previous links
+    return hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+
+
+def source():
+    """
+    Where this request's reads come from. Responses read from a replica may predate
+    the latest version bump (replication lag), so they never share cache entries or
+    ETags with responses read from the primary.
+    """
+    return 'replica' if db_router.replica_reads_enabled() else 'primary'
+
+
+def timeout():
+    """
+    Seconds to keep an entry. One built from replica reads only lives as long as a
+    writer stays pinned to the primary (REPLICA_STICKY_SECONDS), the lag we allow for.
+    """
+    if db_router.replica_reads_enabled():
+        return min(settings.LISTINGS_CACHE_TIMEOUT, settings.REPLICA_STICKY_SECONDS)
+    return settings.LISTINGS_CACHE_TIMEOUT
+
+
+def cache_key(request):
+    return f'listings:v{get_version()}:{source()}:{request.accepted_media_type}:{_url_hash(request)}'
+
+
+def validators_key(request):
+    return f'listings:v{get_version()}:{source()}:validators:{_url_hash(request)}'
+
+
+def cached_response(view, request, handler, *args, **kwargs):
+    """
+    Serves ``handler``'s response from the cache when possible.
+    Only successful JSON responses are cached; the browsable API is always rendered fresh.
+    """
+    if not isinstance(getattr(request, 'accepted_renderer', None), JSONRenderer):
+        return handler(request, *args, **kwargs)
+
+    key = cache_key(request)
+    cached = cache.get(key)
+    if cached is not None:
+        _incr(HITS_KEY)
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    _incr(MISSES_KEY)
+    response = handler(request, *args, **kwargs)
+    if response.status_code == 200:
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = view.get_renderer_context()
+        response.render()
+        cache.set(key, (response.content, response['Content-Type']), timeout())
+    response['X-Cache'] = 'MISS'
+    return response
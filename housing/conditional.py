@@ -0,0 +1,90 @@
+"""
+ETag / Last-Modified support for the listings API.
+
+With a cache shared between processes, list pages are validated by the global
+listings version (see housing/cache.py), the read source (replica or primary) and
+the request URL: every listing write bumps the version, so the ETag changes exactly
+when a cached page would, and Last-Modified is the time of the latest bump. A
+per-process cache (LocMem) never sees writes made by other workers or by management
+commands, so there list pages fall back to an aggregate (max updated_at + row count)
+over the filtered rows, like detail and batch responses over their own rows, hashed
+with the request path. A matching If-None-Match or If-Modified-Since is answered with
+304 before anything is serialized. Validators are also cached under the current
+listings version for the cache timeout, so a repeat visit costs no query and an
+aggregate is never older than that.
+
+Deleting a listing lowers the count but not max(updated_at), so only the ETag is
+guaranteed to change on deletes; clients should prefer If-None-Match.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from main.caching import cache_is_shared
+from . import cache as listings_cache
+
+
+def list_validators(view, request):
+    if not cache_is_shared():
+        queryset = view.filter_queryset(view.get_queryset())
+        aggregate = queryset.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        return _validators(request, aggregate['last_modified'], aggregate['count'])
+    # Every listing write bumps the listings version, so the version and the URL pin
+    # down the page exactly, given the source: a lagging replica can serve an older page
+    # under the same version. Unlike an aggregate over the filtered rows this costs no
+    # query, however deep the cursor.
+    seed = f'{listings_cache.get_version()}:{listings_cache.source()}:{request.build_absolute_uri()}'
+    etag = f'"{hashlib.sha1(seed.encode()).hexdigest()}"'
+    return etag, listings_cache.last_modified()
+
+
+def detail_validators(view, request):
+    lookup = view.kwargs[view.lookup_url_kwarg or view.lookup_field]
+    try:
+        updated_at = view.get_queryset().filter(pk=lookup).values_list('updated_at', flat=True).first()
+    except (TypeError, ValueError):
+        return None, None
+    if updated_at is None:
+        return None, None
+    return _validators(request, updated_at, 1)
+
+
+def batch_validators(view, request):
+    queryset = view.get_queryset().filter(pk__in=view.get_batch_ids())
+    aggregate = queryset.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    return _validators(request, aggregate['last_modified'], aggregate['count'])
+
+
+def _validators(request, last_modified, count):
+    seed = f'{last_modified.isoformat() if last_modified else ""}:{count}:{request.get_full_path()}'
+    etag = f'"{hashlib.sha1(seed.encode()).hexdigest()}"'
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return etag, timestamp
+
+
+def conditional_response(view, request, compute_validators, handler, *args, **kwargs):
+    """
+    Answers conditional GETs with 304 when the validators still match, otherwise
+    runs ``handler`` and stamps ETag / Last-Modified on the successful response.
+    """
+    key = listings_cache.validators_key(request)
+    validators = cache.get(key)
+    if validators is None:
+        validators = compute_validators(view, request)
+        cache.set(key, validators, listings_cache.timeout())
+    etag, last_modified = validators
+
+    if etag is not None:
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+    response = handler(request, *args, **kwargs)
+    if etag is not None and response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,143 @@
+"""
+Read-only fast path for serializing House and SavedHouse rows.
+
+DRF's ModelSerializer calls get_attribute() and to_representation() for every field
+of every instance, which dominates the CPU time of large list responses. Here rows
+come straight from ``.values()`` as dicts, and each column is converted with a
+precomputed function that mirrors the matching DRF field's output (Decimal ->
+quantized string, datetime -> ISO 8601 with "Z"). Plain int/str columns are passed
+through untouched. The result is made of plain dicts/str/int, which the stock DRF
+JSONRenderer encodes on json's C fast path, and is byte-identical to
+HouseSerializer / SavedHouseSerializer output (see housing/tests.py).
+"""
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+
+from main import instrumentation
+
+from .serializer import HouseSerializer, SavedHouseSerializer
+
+
+# DRF field types whose to_representation() is the identity for values from the DB
+_PASSTHROUGH = (
+    serializers.IntegerField, serializers.FloatField, serializers.CharField, serializers.BooleanField,
+)
+
+
+# Converter factories take the active timezone, so timezone lookups happen once per
+# call instead of once per row, and return a function for non-None DB values.
+
+def _decimal_converter(field):
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.Context(prec=field.max_digits)
+    coerce = getattr(field, 'coerce_to_string', None)
+    if coerce is None:
+        coerce = serializers.api_settings.COERCE_DECIMAL_TO_STRING
+
+    def convert(value):
+        value = value.quantize(exponent, rounding=field.rounding, context=context)
+        if field.normalize_output:
+            value = value.normalize()
+        return '{:f}'.format(value) if coerce else value
+    return lambda tz: convert
+
+
+def _datetime_converter(field):
+    def bind(tz):
+        if tz is None or getattr(field, 'timezone', tz) is not tz:
+            return field.to_representation
+
+        def convert(value):
+            value = value.astimezone(tz).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+    return bind
+
+
+def _converter(field):
+    """Returns a converter factory mirroring ``field.to_representation``, or None for identity."""
+    if isinstance(field, serializers.DecimalField) and not field.localize:
+        return _decimal_converter(field)
+    output_format = getattr(field, 'format', serializers.api_settings.DATETIME_FORMAT)
+    if isinstance(field, serializers.DateTimeField) and str(output_format).lower() == ISO_8601:
+        return _datetime_converter(field)
+    if isinstance(field, _PASSTHROUGH) and not isinstance(field, serializers.DecimalField):
+        return None
+    return lambda tz: field.to_representation
+
+
+def _bind(columns):
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    return [(name, None if factory is None else factory(tz)) for name, factory in columns]
+
+
+def house_columns(fields=None):
+    """(name, converter factory) pairs in HouseSerializer field order, optionally limited to ``fields``."""
+    return _house_columns(tuple(fields) if fields is not None else None)
+
+
+@lru_cache(maxsize=64)
+def _house_columns(fields):
+    serializer = HouseSerializer(fields=list(fields) if fields is not None else None)
+    return tuple(
+        (name, _converter(field))
+        for name, field in serializer.fields.items()
+        if not field.write_only
+    )
+
+
+def house_value_fields(fields=None):
+    """The column names to pass to ``House.objects.values()`` for the fast path."""
+    return [name for name, _ in house_columns(fields)]
+
+
+def _render(row, columns, prefix=''):
+    data = {}
+    for name, convert in columns:
+        value = row[prefix + name]
+        data[name] = value if value is None or convert is None else convert(value)
+    return data
+
+
+@instrumentation.timed('serialize')
+def serialize_houses(rows, fields=None):
+    """Serializes House ``.values()`` dicts; matches ``HouseSerializer(fields=fields, many=True).data``."""
+    columns = _bind(house_columns(fields))
+    return [_render(row, columns) for row in rows]
+
+
+@lru_cache(maxsize=1)
+def saved_house_columns():
+    serializer = SavedHouseSerializer()
+    return tuple(
+        (name, _converter(field))
+        for name, field in serializer.fields.items()
+        if not field.write_only and name != 'house'
+    )
+
+
+def saved_house_value_fields():
+    """The column names to pass to ``SavedHouse.objects.values()`` for the fast path."""
+    return [name for name, _ in saved_house_columns()] + [
+        f'house__{name}' for name, _ in house_columns()
+    ]
+
+
+@instrumentation.timed('serialize')
+def serialize_saved_houses(rows):
+    """Serializes SavedHouse ``.values()`` dicts; matches ``SavedHouseSerializer(many=True).data``."""
+    house = _bind(house_columns())
+    saved = _bind(saved_house_columns())
+    order = [name for name, field in SavedHouseSerializer().fields.items() if not field.write_only]
+    result = []
+    for row in rows:
+        data = _render(row, saved)
+        data['house'] = _render(row, house, prefix='house__')
+        result.append({name: data[name] for name in order})
+    return result
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from . import geo
+
+
+def finite_decimal(value):
+    """Decimal(value), rejecting NaN and Infinity, which Decimal accepts but the rent column can't."""
+    number = Decimal(value)
+    if not number.is_finite():
+        raise ValueError(value)
+    return number
+
+
+# Server-side filtering for the listings API.
+# Supported query parameters:
+#   min_rent / max_rent   - rent range (inclusive)
+#   min_beds / min_baths  - minimum bedrooms / bathrooms
+#   min_sqft / max_sqft   - square_feet range (inclusive)
+#   oid                   - comma separated list of listing ids, e.g. ?oid=1,5,9
+#   near, radius          - listings within radius km (default 2, max 50) of near=lat,lng
+class ListingsFilterBackend(BaseFilterBackend):
+    default_radius_km = 2
+    max_radius_km = 50
+
+    range_filters = {
+        'min_rent': ('rent__gte', finite_decimal),
+        'max_rent': ('rent__lte', finite_decimal),
+        'min_beds': ('beds__gte', int),
+        'min_baths': ('baths__gte', int),
+        'min_sqft': ('square_feet__gte', int),
+        'max_sqft': ('square_feet__lte', int),
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        queryset, near = self.filter_lookups(request, queryset)
+        if near:
+            queryset = geo.filter_near(queryset, *near)
+        return queryset
+
+    def filter_lookups(self, request, queryset):
+        """Applies the plain field filters; returns (queryset, (lat, lng, radius) or None)."""
+        params = request.query_params
+        lookups = {}
+
+        for param, (lookup, cast) in self.range_filters.items():
+            value = params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                lookups[lookup] = cast(value)
+            except (ValueError, ArithmeticError):
+                raise ValidationError({param: f'Expected a number, got "{value}".'})
+
+        oids = params.get('oid')
+        if oids:
+            lookups['oid__in'] = parse_id_list(oids, 'oid')
+
+        if lookups:
+            queryset = queryset.filter(**lookups)
+
+        near = params.get('near')
+        if near:
+            near = self.parse_near(near, params.get('radius'))
+        return queryset, near or None
+
+    def parse_near(self, near, radius):
+        try:
+            latitude, longitude = (float(part) for part in near.split(','))
+        except ValueError:
+            raise ValidationError({'near': 'Expected "latitude,longitude".'})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({'near': 'Coordinates are out of range.'})
+        try:
+            radius = float(radius) if radius not in (None, '') else self.default_radius_km
+        except ValueError:
+            raise ValidationError({'radius': f'Expected a number, got "{radius}".'})
+        if not 0 < radius <= self.max_radius_km:
+            raise ValidationError({'radius': f'Must be between 0 and {self.max_radius_km} km.'})
+        return latitude, longitude, radius
+
+
+# Largest value of the 64-bit oid column; bigger ids can't exist and overflow the query
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_id_list(value, param):
+    """Parses "1,2,3" into [1, 2, 3], raising a 400 for anything that isn't an id."""
+    try:
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise ValidationError({param: 'Expected a comma separated list of integers.'})
+    if any(not 1 <= oid <= MAX_ID for oid in ids):
+        raise ValidationError({param: f'Ids must be between 1 and {MAX_ID}.'})
+    return ids
@@ -0,0 +1,136 @@
+"""
+Coordinates for House listings without PostGIS.
+
+Addresses are turned into latitude/longitude by a pluggable geocoder (the class named
+by settings.HOUSING_GEOCODER). The default looks addresses up in a local CSV table
+(address,latitude,longitude) so nothing leaves the server. Each located house also gets
+a geohash cell id for grid bucketing.
+
+"Near me" queries select candidates with a bounding box on the (latitude, longitude)
+index and then check the exact great-circle distance, both inside the same SQL query.
+"""
+import csv
+import math
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Cos, Power, Radians, Sin
+from django.utils.module_loading import import_string
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+GEOHASH_PRECISION = 9
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+class Geocoder:
+    """Base class: geocode() returns (latitude, longitude) or None when the address is unknown."""
+
+    def geocode(self, address):
+        raise NotImplementedError
+
+
+class NullGeocoder(Geocoder):
+    def geocode(self, address):
+        return None
+
+
+class LookupTableGeocoder(Geocoder):
+    """Looks addresses up in a CSV file with address, latitude and longitude columns."""
+
+    def __init__(self, path=None):
+        self.path = str(path or settings.GEOCODER_TABLE)
+
+    def geocode(self, address):
+        return _load_table(self.path).get(normalize_address(address))
+
+
+def normalize_address(address):
+    return ' '.join((address or '').lower().replace(',', ' ').split())
+
+
+@lru_cache(maxsize=8)
+def _load_table(path):
+    if not Path(path).exists():
+        return {}
+    with open(path, newline='', encoding='utf-8') as table:
+        return {
+            normalize_address(row['address']): (float(row['latitude']), float(row['longitude']))
+            for row in csv.DictReader(table)
+        }
+
+
+def get_geocoder():
+    return import_string(settings.HOUSING_GEOCODER)()
+
+
+def locate(house, geocoder=None):
+    """Fills in latitude/longitude (when the address geocodes) and geohash on ``house``."""
+    coords = (geocoder or get_geocoder()).geocode(house.address)
+    if coords is not None:
+        house.latitude, house.longitude = coords
+    if house.latitude is not None and house.longitude is not None:
+        house.geohash = geohash_encode(house.latitude, house.longitude)
+    else:
+        house.geohash = ''
+    return house
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) of a box that contains the whole circle."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    dlng = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+    return latitude - dlat, latitude + dlat, longitude - dlng, longitude + dlng
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def filter_near(queryset, latitude, longitude, radius_km):
+    """
+    Narrows ``queryset`` to houses within ``radius_km`` of the point. Both the bounding
+    box and the exact distance are SQL conditions, so nothing is fetched until the
+    caller evaluates its own (paginated) queryset.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    # haversine_km() <= radius_km, rearranged to compare the haversine term itself, so
+    # the SQL needs no asin/sqrt; the point's own cos(latitude) is a constant
+    half_dphi = Radians(F('latitude') - latitude) / 2
+    half_dlambda = Radians(F('longitude') - longitude) / 2
+    haversine = (
+        Power(Sin(half_dphi), 2)
+        + math.cos(math.radians(latitude)) * Cos(Radians('latitude')) * Power(Sin(half_dlambda), 2)
+    )
+    return queryset.filter(
+        latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng)
+    ).alias(near_haversine=haversine).filter(
+        near_haversine__lte=math.sin(radius_km / (2 * EARTH_RADIUS_KM)) ** 2
+    )
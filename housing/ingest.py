@@ -0,0 +1,150 @@
+"""
+Bulk import / export of House listings (CSV or NDJSON).
+
+Imports are validated with HouseSerializer and written in chunks: each chunk is one
+transaction with one bulk_create for new addresses and one bulk_update for addresses
+that already exist (upsert by address). Exports stream rows from an iterator()-backed
+queryset, so memory stays flat no matter how big the table is.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache, geo, search
+from .models import House
+from .serializer import HouseSerializer
+
+
+CHUNK_SIZE = 500
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# Columns written by exports, in table order (oid first)
+EXPORT_FIELDS = [f.attname for f in House._meta.concrete_fields]
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    rejected: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {'created': self.created, 'updated': self.updated, 'rejected': self.rejected}
+
+
+def read_rows(lines, fmt):
+    """
+    Yields (line_number, row) pairs from an iterable of text lines.
+    A row that can't be parsed is yielded as (line_number, None).
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Blank CSV cells mean "use the default", not "empty string"
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}
+    else:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+
+
+def import_rows(rows, chunk_size=CHUNK_SIZE):
+    """Validates and upserts (line_number, row) pairs, ``chunk_size`` rows per transaction."""
+    result = ImportResult()
+    chunk = []
+    for number, row in rows:
+        chunk.append((number, row))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, result)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, result)
+    if result.created or result.updated:
+        cache.bump_version()
+    return result
+
+
+def _import_chunk(chunk, result):
+    valid = {}
+    for number, row in chunk:
+        if row is None:
+            result.rejected.append({'line': number, 'errors': {'non_field_errors': ['Could not parse row.']}})
+            continue
+        serializer = HouseSerializer(data=row)
+        if serializer.is_valid():
+            # Later rows for the same address win
+            valid[serializer.validated_data.get('address', '')] = serializer.validated_data
+        else:
+            result.rejected.append({'line': number, 'errors': serializer.errors})
+    if not valid:
+        return
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {}
+        for house in House.objects.filter(address__in=valid.keys()).order_by('-oid'):
+            existing[house.address] = house  # lowest oid wins when addresses repeat
+
+        to_update, to_create = [], []
+        for address, data in valid.items():
+            house = existing.get(address)
+            if house is None:
+                to_create.append(House(**data))
+                continue
+            for name, value in data.items():
+                setattr(house, name, value)
+            house.updated_at = now  # bulk_update skips auto_now
+            to_update.append(house)
+
+        # bulk writes skip pre_save, so geocode here
+        geocoder = geo.get_geocoder()
+        for house in to_create + to_update:
+            geo.locate(house, geocoder)
+
+        created = House.objects.bulk_create(to_create)
+        if to_update:
+            fields = sorted(
+                {name for data in valid.values() for name in data}
+                | {'latitude', 'longitude', 'geohash', 'updated_at'}
+            )
+            House.objects.bulk_update(to_update, fields)
+        # ...and post_save, so refresh the search index here too
+        search.index_houses(created + to_update)
+
+    result.created += len(created)
+    result.updated += len(to_update)
+
+
+def _export_values(row):
+    row['rent'] = str(row['rent'])
+    row['updated_at'] = row['updated_at'].isoformat()
+    return row
+
+
+class _Echo:
+    # csv.writer only needs an object with write(); hand each line straight back
+    def write(self, value):
+        return value
+
+
+def export_lines(fmt, queryset=None):
+    """Yields the listings table as CSV or NDJSON text, one row at a time."""
+    queryset = House.objects.order_by('oid') if queryset is None else queryset
+    rows = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=2000)
+    if fmt == 'csv':
+        writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+        yield writer.writerow(dict(zip(EXPORT_FIELDS, EXPORT_FIELDS)))
+        for row in rows:
+            yield writer.writerow(_export_values(row))
+    else:
+        for row in rows:
+            yield json.dumps(_export_values(row), ensure_ascii=False) + '\n'
@@ -0,0 +1,22 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from housing import ingest
+
+
+class Command(BaseCommand):
+    help = "Streams every house listing out as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=ingest.FORMATS, default="ndjson")
+        parser.add_argument("--output", help="File to write (defaults to stdout)")
+
+    def handle(self, *args, **options):
+        out = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else sys.stdout
+        try:
+            for line in ingest.export_lines(options["format"]):
+                out.write(line)
+        finally:
+            if out is not sys.stdout:
+                out.close()
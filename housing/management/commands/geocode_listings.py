@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from housing import cache, geo
+from housing.models import House
+
+
+class Command(BaseCommand):
+    help = "Fills in latitude/longitude/geohash for listings using the configured geocoder."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-geocode listings that already have coordinates")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = House.objects.order_by("oid").only("oid", "address", "latitude", "longitude", "geohash", "updated_at")
+        if not options["all"]:
+            queryset = queryset.filter(latitude__isnull=True)
+
+        fields = ["latitude", "longitude", "geohash", "updated_at"]
+        geocoder = geo.get_geocoder()
+        now = timezone.now()
+        batch, located = [], 0
+        for house in queryset.iterator(chunk_size=options["batch_size"]):
+            geo.locate(house, geocoder)
+            house.updated_at = now
+            if house.latitude is not None:
+                located += 1
+            batch.append(house)
+            if len(batch) >= options["batch_size"]:
+                House.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            House.objects.bulk_update(batch, fields)
+        cache.bump_version()
+
+        self.stdout.write(self.style.SUCCESS(f"Located {located} listings."))
@@ -0,0 +1,33 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from housing import ingest
+
+
+class Command(BaseCommand):
+    help = "Bulk imports house listings from a CSV or NDJSON file, upserting by address."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import")
+        parser.add_argument(
+            "--format", choices=ingest.FORMATS,
+            help="File format (defaults to the file extension; .jsonl/.ndjson mean NDJSON)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=ingest.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+
+        with path.open(newline="", encoding="utf-8") as lines:
+            result = ingest.import_rows(ingest.read_rows(lines, fmt), chunk_size=options["chunk_size"])
+
+        for rejected in result.rejected:
+            self.stderr.write(f"line {rejected['line']}: {json.dumps(rejected['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result.created}, updated {result.updated}, rejected {len(result.rejected)}."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from main import blacklist
+
+
+class Command(BaseCommand):
+    help = "Deletes expired JWT refresh tokens from the outstanding and blacklisted token tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Tokens deleted per query")
+
+    def handle(self, *args, **options):
+        pruned = blacklist.prune_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {pruned} expired tokens."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from housing import search
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the SQLite full-text index for house listings (Postgres maintains its own)."
+
+    def handle(self, *args, **options):
+        if not search.uses_fts5():
+            self.stdout.write("Postgres search_vector is a generated column; nothing to rebuild.")
+            return
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from housing import popularity
+
+
+class Command(BaseCommand):
+    help = "Recomputes House.save_count from saved listings and fixes any that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        fixed = popularity.repair(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Repaired {fixed} save counts."))
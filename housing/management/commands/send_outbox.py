@@ -0,0 +1,33 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from housing import outbox
+
+
+class Command(BaseCommand):
+    help = "Delivers queued outbox emails. Runs until the queue is empty, or forever with --loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Messages sent per SMTP connection")
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new messages")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between polls with --loop")
+        parser.add_argument("--keep-days", type=int, default=7, help="Delete sent messages older than this")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, retrying, failed = outbox.deliver_due(options["batch_size"], options["max_attempts"])
+            total_sent += sent
+            total_failed += failed
+            if sent or retrying or failed:
+                continue
+            # Queue drained (or everything left is waiting for a retry)
+            outbox.purge_sent(timedelta(days=options["keep_days"]))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Sent {total_sent} emails, {total_failed} failed permanently."))
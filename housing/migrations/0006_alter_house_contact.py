@@ -13,6 +13,6 @@ class Migration(migrations.Migration):
         migrations.AlterField(
             model_name='house',
             name='contact',
-            field=models.CharField(default='Number, Email, or Social Media etc.'),
+            field=models.CharField(default='Number, Email, or Social Media etc.', max_length=255),
         ),
     ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housing', '0008_alter_house_baths_alter_house_beds_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['rent', 'beds'], name='house_rent_beds_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['beds', 'baths', 'rent'], name='house_beds_baths_rent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['square_feet'], name='house_square_feet_idx'),
+        ),
+    ]
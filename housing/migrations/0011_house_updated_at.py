@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housing', '0010_house_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='house',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housing', '0011_house_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savedhouse',
+            index=models.Index(fields=['user', '-saved_at'], name='savedhouse_user_saved_at_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:09
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_save_counts(apps, schema_editor):
+    House = apps.get_model('housing', 'House')
+    SavedHouse = apps.get_model('housing', 'SavedHouse')
+    counts = (
+        SavedHouse.objects.filter(house=OuterRef('pk'))
+        .order_by().values('house').annotate(n=Count('pk')).values('n')
+    )
+    House.objects.update(save_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housing', '0013_house_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='house',
+            name='save_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['-save_count', '-oid'], name='house_save_count_idx'),
+        ),
+        migrations.RunPython(backfill_save_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:28
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housing', '0015_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='house',
+            name='house_square_feet_idx',
+        ),
+        migrations.AddField(
+            model_name='house',
+            name='price_per_sqft',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(square_feet__gt=0, then=django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('rent', models.FloatField()), '/', models.F('square_feet'))), default=None, output_field=models.FloatField()), output_field=models.FloatField()),
+        ),
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['rent', 'oid'], name='house_rent_oid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['beds', 'oid'], name='house_beds_oid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['square_feet', 'oid'], name='house_square_feet_oid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['price_per_sqft', 'oid'], name='house_price_per_sqft_idx'),
+        ),
+    ]
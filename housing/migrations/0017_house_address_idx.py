@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housing', '0016_house_sort_orderings'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='house',
+            index=models.Index(fields=['address'], name='house_address_idx'),
+        ),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import Case, F, When
+from django.db.models.functions import Cast
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
@@ -25,6 +28,49 @@ class House(models.Model):
     
     contact = models.CharField(max_length=255,default="Number, Email, or Social Media etc.")
 
+    # Filled in from the address by the configured geocoder (see housing/geo.py)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True)
+
+    # Set on every save; used for ETag / Last-Modified on the listings API
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Number of users who saved this listing, kept in step by the saved listings views
+    # (see housing/popularity.py); repair with `manage.py repair_save_counts`
+    save_count = models.PositiveIntegerField(default=0)
+
+    # Monthly rent per square foot, computed and stored by the database; NULL when the
+    # size is unknown. Sortable with ?ordering=price_per_sqft
+    price_per_sqft = models.GeneratedField(
+        expression=Case(
+            When(square_feet__gt=0, then=Cast('rent', models.FloatField()) / F('square_feet')),
+            default=None,
+            output_field=models.FloatField(),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        # Composite indexes backing the range filters on the listings API
+        indexes = [
+            models.Index(fields=['rent', 'beds'], name='house_rent_beds_idx'),
+            models.Index(fields=['beds', 'baths', 'rent'], name='house_beds_baths_rent_idx'),
+            # Upsert lookups by address in bulk imports (see housing/ingest.py)
+            models.Index(fields=['address'], name='house_address_idx'),
+            # Bounding-box scans for ?near= queries
+            models.Index(fields=['latitude', 'longitude'], name='house_lat_lng_idx'),
+            # ?ordering=-save_count ("most saved"), ties broken by newest
+            models.Index(fields=['-save_count', '-oid'], name='house_save_count_idx'),
+            # The other ?ordering= keys, ties broken by oid; each serves both directions
+            # (and the square_feet index the range filter too)
+            models.Index(fields=['rent', 'oid'], name='house_rent_oid_idx'),
+            models.Index(fields=['beds', 'oid'], name='house_beds_oid_idx'),
+            models.Index(fields=['square_feet', 'oid'], name='house_square_feet_oid_idx'),
+            models.Index(fields=['price_per_sqft', 'oid'], name='house_price_per_sqft_idx'),
+        ]
+
 # tracks which houses users have saved
 class SavedHouse(models.Model):
     # on_delete=CASCADE means if user is deleted, their saved houses are also deleted
@@ -37,6 +83,40 @@ class SavedHouse(models.Model):
     class Meta:
         # Ensures a user can't save the same house twice
         unique_together = ('user', 'house')
+        indexes = [
+            # Serves "this user's saves, newest first" for the saved listings API
+            models.Index(fields=['user', '-saved_at'], name='savedhouse_user_saved_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} saved {self.house.address}"
+
+
+# Outgoing email waiting to be delivered by `manage.py send_outbox` (see housing/outbox.py).
+# Lives in the housing app because auth/ is not an installed app.
+class OutboxEmail(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # The worker picks up pending rows whose next_attempt_at has passed
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} saved {self.house.address}"
\ No newline at end of file
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,99 @@
+"""
+Persistent email outbox.
+
+Request handlers call ``enqueue()`` instead of ``send_mail()``: it only inserts an
+OutboxEmail row, so a slow or unreachable mail server never holds up a request.
+``deliver_due()`` (run by ``manage.py send_outbox``) sends due messages in batches
+over one reused EMAIL_BACKEND connection. A failed message is retried with
+exponential backoff (RETRY_BASE_SECONDS, doubling, capped at RETRY_MAX_SECONDS)
+and marked failed after ``max_attempts``.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+# How long a claimed batch is hidden from other workers while it is being sent
+CLAIM_SECONDS = 300
+
+
+def enqueue(subject, message, from_email, recipient_list):
+    """Same arguments as django.core.mail.send_mail(); returns the OutboxEmail."""
+    return OutboxEmail.objects.create(
+        subject=subject, body=message, from_email=from_email, to=list(recipient_list)
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def _claim(batch_size):
+    """Locks up to batch_size due messages for this worker by pushing back next_attempt_at."""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS)
+        )
+    return emails
+
+
+def deliver_due(batch_size=100, max_attempts=5):
+    """Sends one batch of due messages; returns (sent, retrying, failed) counts for the batch."""
+    emails = _claim(batch_size)
+    if not emails:
+        return 0, 0, 0
+
+    sent = retrying = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        for email in emails:
+            email.attempts += 1
+            message = EmailMessage(email.subject, email.body, email.from_email, email.to)
+            try:
+                # Opening explicitly keeps the connection up across send_messages() calls
+                connection.open()
+                connection.send_messages([message])
+            except Exception as exc:
+                logger.warning("Sending outbox email %s failed (attempt %s): %s", email.pk, email.attempts, exc)
+                email.last_error = repr(exc)
+                if email.attempts >= max_attempts:
+                    email.status = OutboxEmail.FAILED
+                    failed += 1
+                else:
+                    email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+                    retrying += 1
+                # The connection may be broken; the next open() starts a fresh one
+                connection.close()
+            else:
+                email.status = OutboxEmail.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ""
+                sent += 1
+    finally:
+        connection.close()
+        OutboxEmail.objects.bulk_update(
+            emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+    return sent, retrying, failed
+
+
+def purge_sent(older_than):
+    """Deletes messages sent more than ``older_than`` (a timedelta) ago."""
+    deleted, _ = OutboxEmail.objects.filter(
+        status=OutboxEmail.SENT, sent_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
@@ -0,0 +1,285 @@
+"""
+Cursor and page-number pagination for the listings, saved listings and search APIs.
+
+AsyncCursorPagination copies the body of DRF's CursorPagination.paginate_queryset
+and imports DRF's private helpers _positive_int and _reverse_ordering, so it is tied
+to the DRF release it was written against: djangorestframework 3.16.0, pinned
+exactly in requirements.txt. CursorPaginationParityTests checks its pages and links
+against the stock class; when upgrading DRF, run them and compare with the new
+paginate_queryset.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination, _positive_int, _reverse_ordering
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import search
+
+
+# DRF's CursorPagination.paginate_queryset, split around the queries it runs so
+# async views can fetch the page with the async ORM (apaginate_queryset) while the
+# cursor bookkeeping stays shared with the sync path. A page is read from one or
+# more querysets (`segments`) in turn until it is full.
+class AsyncCursorPagination(CursorPagination):
+    def paginate_queryset(self, queryset, request, view=None):
+        segments = self.page_querysets(queryset, request, view)
+        if segments is None:
+            return None
+        results, offset = [], self._offset
+        for segment in segments:
+            if len(results) > self.page_size:
+                break
+            results += segment[offset:offset + self.page_size + 1 - len(results)]
+            offset = 0
+        return self.finish_page(results)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        segments = self.page_querysets(queryset, request, view)
+        if segments is None:
+            return None
+        results, offset = [], self._offset
+        for segment in segments:
+            if len(results) > self.page_size:
+                break
+            results += [row async for row in segment[offset:offset + self.page_size + 1 - len(results)]]
+            offset = 0
+        return self.finish_page(results)
+
+    def page_querysets(self, queryset, request, view=None):
+        """The unevaluated querysets the requested page is read from, in order (plus one row)."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+        self._reverse, self._current_position, self._offset = reverse, current_position, offset
+
+        return self.segments(queryset, current_position, reverse)
+
+    def segments(self, queryset, position, reverse):
+        """Querysets holding the rows past ``position``, each ordered and in paging order."""
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            queryset = self.seek(queryset, position, reverse)
+        return [queryset]
+
+    def seek(self, queryset, position, reverse):
+        """Rows past the cursor ``position`` in the paging direction (DRF: the first ordering field only)."""
+        order = self.ordering[0]
+        order_attr = order.lstrip('-')
+        if reverse != order.startswith('-'):
+            return queryset.filter(**{order_attr + '__lt': position})
+        return queryset.filter(**{order_attr + '__gt': position})
+
+    def finish_page(self, results):
+        """Sets the next/previous positions from the fetched rows and returns the page."""
+        reverse, current_position, offset = self._reverse, self._current_position, self._offset
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+# Keyset (cursor) pagination for the listings API.
+# Each page is fetched with "WHERE oid < <last seen oid> ORDER BY oid DESC LIMIT n",
+# so deep pages cost the same as the first one. Cursors are opaque base64 tokens
+# returned in the "next"/"previous" links.
+# ?ordering= picks one of `orderings`; each ends in oid and is backed by an index on
+# the same columns. The cursor holds the last row's value for every ordering column,
+# so a page seeks on the whole tuple ("WHERE key < x OR (key = x AND oid < y)").
+# DRF's own cursor only seeks on the first column and skips ties with an offset
+# capped at 1000, which loops forever once more rows than that share a value.
+class ListingsCursorPagination(AsyncCursorPagination):
+    ordering = '-oid'
+    page_size = settings.LISTINGS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.LISTINGS_MAX_PAGE_SIZE
+
+    ordering_param = 'ordering'
+    orderings = {
+        '-oid': ('-oid',),
+        '-save_count': ('-save_count', '-oid'),
+        'rent': ('rent', 'oid'),
+        '-rent': ('-rent', '-oid'),
+        'square_feet': ('square_feet', 'oid'),
+        '-square_feet': ('-square_feet', '-oid'),
+        'beds': ('beds', 'oid'),
+        '-beds': ('-beds', '-oid'),
+        'price_per_sqft': ('price_per_sqft', 'oid'),
+        '-price_per_sqft': ('-price_per_sqft', '-oid'),
+    }
+    # Sort keys that can be NULL. Listings without a value come last in either
+    # direction, read as a second segment ordered by oid once the others run out.
+    nullable_keys = ('square_feet', 'price_per_sqft')
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            values = [instance[field.lstrip('-')] for field in ordering]
+        else:
+            values = [getattr(instance, field.lstrip('-')) for field in ordering]
+        return json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+    def _decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list):
+            values = [values]  # a plain value, from cursors made before the tuple format
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def segments(self, queryset, position, reverse):
+        key = self.ordering[0].lstrip('-')
+        if key not in self.nullable_keys:
+            return super().segments(queryset, position, reverse)
+
+        def ordered(rows, ordering):
+            return rows.order_by(*(_reverse_ordering(ordering) if reverse else ordering))
+
+        present = ordered(queryset.filter(**{f'{key}__isnull': False}), self.ordering)
+        missing = ordered(queryset.filter(**{f'{key}__isnull': True}), self.ordering[1:])
+        if position is None:
+            return [missing, present] if reverse else [present, missing]
+        values = self._decode_position(position)
+        if values[0] is None:
+            # The cursor is on a listing without a value: carry on through those by oid
+            missing = self._seek(missing, self.ordering[1:], values[1:], reverse)
+            return [missing, present] if reverse else [missing]
+        present = self._seek(present, self.ordering, values, reverse)
+        return [present] if reverse else [present, missing]
+
+    def seek(self, queryset, position, reverse):
+        return self._seek(queryset, self.ordering, self._decode_position(position), reverse)
+
+    def _seek(self, queryset, ordering, values, reverse):
+        # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., per column direction
+        condition, equal = Q(), {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if reverse != field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        # The redundant bound on the first column lets the index range scan start there
+        first = ordering[0]
+        bound = 'lte' if reverse != first.startswith('-') else 'gte'
+        try:
+            return queryset.filter(Q(**{f'{first.lstrip("-")}__{bound}': values[0]}), condition)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_ordering(self, request, queryset, view):
+        value = request.query_params.get(self.ordering_param)
+        if value in (None, ''):
+            return (self.ordering,)
+        if value not in self.orderings:
+            raise ValidationError({
+                self.ordering_param: f'Unsupported ordering "{value}". Choose from: {", ".join(self.orderings)}.'
+            })
+        return self.orderings[value]
+
+
+# Cursor pagination for a user's saved listings, most recently saved first.
+# Backed by the (user, -saved_at) index on SavedHouse.
+class SavedCursorPagination(AsyncCursorPagination):
+    ordering = '-saved_at'
+    page_size = settings.LISTINGS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.LISTINGS_MAX_PAGE_SIZE
+
+
+# Page-number pagination for ranked full-text search results.
+# Ranked results have no stable key to seek on, so this uses LIMIT/OFFSET, but it
+# fetches one extra row instead of counting every match to decide if there is a next page.
+# Pages starting past max_offset are a 404, like an invalid page in DRF's PageNumberPagination.
+class SearchPagination(BasePagination):
+    page_query_param = 'page'
+    page_size = settings.LISTINGS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.LISTINGS_MAX_PAGE_SIZE
+    max_offset = 10000
+    invalid_page_message = 'Invalid page.'
+
+    def paginate_search(self, query, request):
+        self.request = request
+        try:
+            self.page = _positive_int(request.query_params.get(self.page_query_param, 1), strict=True)
+        except ValueError:
+            self.page = 1
+        try:
+            size = _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            size = self.page_size
+
+        offset = (self.page - 1) * size
+        if offset > self.max_offset:
+            raise NotFound(self.invalid_page_message)
+        oids = search.search_oids(query, limit=size + 1, offset=offset)
+        self.has_next = len(oids) > size
+        return oids[:size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page + 1)
+
+    def get_previous_link(self):
+        if self.page == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page - 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
@@ -0,0 +1,84 @@
+"""
+Denormalized House.save_count ("how many users saved this listing").
+
+Counting SavedHouse rows per listing on every list request is a full aggregation, so
+the count is stored on House and adjusted in the same transaction that adds or
+removes SavedHouse rows. Adjustments are single UPDATEs with F() expressions, so
+concurrent saves of the same listing never lose an increment. Anything that bypasses
+the saved listings views (e.g. a user being deleted, cascading their saves) is
+corrected by ``repair()`` / ``manage.py repair_save_counts``.
+"""
+from django.db import connection
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import cache
+from .models import House, SavedHouse
+
+
+def adjust(house_ids, delta):
+    """Add delta (+1 / -1) to save_count of the given listings."""
+    house_ids = list(house_ids)
+    if not house_ids:
+        return 0
+    queryset = House.objects.filter(oid__in=house_ids)
+    if delta < 0:
+        # Never drive a drifted counter below zero; repair() fixes it properly
+        queryset = queryset.filter(save_count__gte=-delta)
+    # save_count is part of the listing payload, so treat the change as an update
+    updated = queryset.update(save_count=F('save_count') + delta, updated_at=timezone.now())
+    cache.bump_version()
+    return updated
+
+
+def save_all(user, house_ids):
+    """Saves ``house_ids`` for ``user`` and counts them; returns the ids actually inserted.
+
+    One INSERT ... ON CONFLICT DO NOTHING RETURNING (Postgres, SQLite 3.35+), so a row
+    that already exists, including one a concurrent request inserted first, is neither
+    inserted nor counted again.
+    """
+    house_ids = list(house_ids)
+    if not house_ids:
+        return set()
+    qn = connection.ops.quote_name
+    saved_at = SavedHouse._meta.get_field('saved_at').get_db_prep_value(timezone.now(), connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {qn(SavedHouse._meta.db_table)} ({qn("user_id")}, {qn("house_id")}, {qn("saved_at")}) '
+            f'VALUES {", ".join(["(%s, %s, %s)"] * len(house_ids))} '
+            f'ON CONFLICT DO NOTHING RETURNING {qn("house_id")}',
+            [value for house_id in house_ids for value in (user.pk, house_id, saved_at)],
+        )
+        inserted = {house_id for (house_id,) in cursor.fetchall()}
+    adjust(inserted, +1)
+    return inserted
+
+
+def repair(batch_size=500):
+    """Recompute save_count from SavedHouse in oid batches; returns the number fixed."""
+    fixed, last_oid = 0, 0
+    while True:
+        stored = dict(
+            House.objects.filter(oid__gt=last_oid).order_by('oid')
+            .values_list('oid', 'save_count')[:batch_size]
+        )
+        if not stored:
+            break
+        last_oid = max(stored)
+        actual = dict(
+            SavedHouse.objects.filter(house_id__in=stored).order_by()
+            .values('house_id').annotate(n=Count('id')).values_list('house_id', 'n')
+        )
+        now = timezone.now()
+        stale = [
+            House(oid=oid, save_count=actual.get(oid, 0), updated_at=now)
+            for oid, count in stored.items()
+            if actual.get(oid, 0) != count
+        ]
+        if stale:
+            House.objects.bulk_update(stale, ['save_count', 'updated_at'])
+            fixed += len(stale)
+    if fixed:
+        cache.bump_version()
+    return fixed
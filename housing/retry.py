@@ -0,0 +1,38 @@
+import functools
+import logging
+import time
+
+from django.db import OperationalError, connection
+
+
+logger = logging.getLogger(__name__)
+
+LOCK_ERRORS = ('database is locked', 'database table is locked')
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and any(message in str(error) for message in LOCK_ERRORS)
+
+
+def retry_on_db_lock(attempts=3, backoff=0.05):
+    """
+    Retries a write view when SQLite reports the database as locked.
+
+    Waits ``backoff``, then twice that, and so on between attempts. Only use this on
+    views whose writes are a single statement or an atomic block, so a retry can't
+    repeat half of the work. Retrying is skipped inside an outer transaction, since
+    that transaction has already failed.
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(*args, **kwargs):
+            for attempt in range(1, attempts + 1):
+                try:
+                    return view_method(*args, **kwargs)
+                except OperationalError as error:
+                    if attempt == attempts or not is_lock_error(error) or connection.in_atomic_block:
+                        raise
+                    logger.warning('Database locked in %s, retry %d of %d', view_method.__qualname__, attempt, attempts - 1)
+                    time.sleep(backoff * 2 ** (attempt - 1))
+        return wrapper
+    return decorator
@@ -0,0 +1,88 @@
+"""
+Full-text search over House.address and House.description.
+
+Postgres keeps a generated ``search_vector`` tsvector column (GIN indexed) on
+housing_house, so it never needs to be maintained by hand. SQLite uses an FTS5
+shadow table, ``housing_house_fts``, keyed by oid; it is kept in sync by the
+House post_save / post_delete signals and can be rebuilt with
+``python manage.py rebuild_search_index``.
+"""
+import re
+
+from django.db import connection
+
+
+FTS_TABLE = 'housing_house_fts'
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def uses_fts5():
+    return connection.vendor == 'sqlite'
+
+
+def _fts5_match(query):
+    # Quote every word so user input can never be parsed as FTS5 syntax;
+    # the last word is a prefix match so "mis" finds "Mission".
+    words = _WORD_RE.findall(query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_oids(query, limit, offset=0):
+    """Returns up to ``limit`` House oids matching ``query``, best match first."""
+    with connection.cursor() as cursor:
+        if uses_fts5():
+            match = _fts5_match(query)
+            if match is None:
+                return []
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [match, limit, offset],
+            )
+        else:
+            cursor.execute(
+                'SELECT oid FROM housing_house, websearch_to_tsquery(\'english\', %s) query '
+                'WHERE search_vector @@ query '
+                'ORDER BY ts_rank(search_vector, query) DESC, oid DESC LIMIT %s OFFSET %s',
+                [query, limit, offset],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def index_houses(houses):
+    """Adds or refreshes the FTS5 rows for the given houses (no-op on Postgres)."""
+    if not uses_fts5():
+        return
+    rows = [(house.oid, house.address, house.description) for house in houses]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, address, description) VALUES (%s, %s, %s)', rows
+        )
+
+
+def remove_houses(oids):
+    """Drops the FTS5 rows for the given oids (no-op on Postgres)."""
+    if not uses_fts5() or not oids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(oid,) for oid in oids])
+
+
+def rebuild_index():
+    """Repopulates the FTS5 table from housing_house (no-op on Postgres)."""
+    if not uses_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, address, description) '
+            'SELECT oid, address, description FROM housing_house'
+        )
@@ -2,19 +2,89 @@ from rest_framework import serializers
 from .models import House, SavedHouse
 from django.contrib.auth.models import User
 
+from main import instrumentation
+
+# .data of these is reported as "serialize" time by the instrumentation middleware
+# (see main/instrumentation.py)
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with instrumentation.timer('serialize'):
+            return super().data
+
+
+class TimedDataMixin:
+    @property
+    def data(self):
+        with instrumentation.timer('serialize'):
+            return super().data
+
+
 # Serializer for the House model.
-class HouseSerializer(serializers.ModelSerializer):
+# Pass fields=[...] to serialize only a subset of the fields (sparse fieldsets).
+class HouseSerializer(TimedDataMixin, serializers.ModelSerializer):
+    # Fields shown on a listing card; requested with ?view=card
+    CARD_FIELDS = ['oid', 'rent', 'beds', 'baths', 'square_feet', 'address']
+
+    # DRF has no mapping for a GeneratedField's output type, so spell it out
+    price_per_sqft = serializers.FloatField(read_only=True)
+
     class Meta:
         model = House
         fields = '__all__'
-        read_only_fields = ['oid']
+        read_only_fields = ['oid', 'geohash', 'save_count']
+        list_serializer_class = TimedListSerializer
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, params):
+        """Fields asked for with ?view=card or ?fields=..., or None for every field."""
+        if params.get('view') == 'card':
+            return cls.CARD_FIELDS
+        if not params.get('fields'):
+            return None
+
+        fields = [name.strip() for name in params['fields'].split(',') if name.strip()]
+        known = cls().fields
+        unknown = [name for name in fields if name not in known]
+        if unknown:
+            raise serializers.ValidationError({'fields': f'Unknown fields: {", ".join(unknown)}'})
+        # A value with no names in it (?fields=,) means every field, like ?fields=
+        return fields or None
 
 # This serializer handles saved listings for users.
-class SavedHouseSerializer(serializers.ModelSerializer):
+class SavedHouseSerializer(TimedDataMixin, serializers.ModelSerializer):
     house = HouseSerializer(read_only=True)
     house_id = serializers.IntegerField(write_only=True)
     
     class Meta:
         model = SavedHouse
         fields = ['id', 'house', 'house_id', 'saved_at']
-        read_only_fields = ['id', 'saved_at']
\ No newline at end of file
+        read_only_fields = ['id', 'saved_at']
+        list_serializer_class = TimedListSerializer
+
+# Input for the bulk save/unsave endpoint: lists of house ids to save and to unsave.
+class SavedHouseBulkSerializer(serializers.Serializer):
+    MAX_IDS = 500
+
+    save = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=2**63 - 1), required=False, default=list
+    )
+    unsave = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=2**63 - 1), required=False, default=list
+    )
+
+    def validate(self, attrs):
+        if not attrs['save'] and not attrs['unsave']:
+            raise serializers.ValidationError('Provide house ids in "save" and/or "unsave".')
+        if len(attrs['save']) + len(attrs['unsave']) > self.MAX_IDS:
+            raise serializers.ValidationError(f'At most {self.MAX_IDS} house ids per request.')
+        overlap = set(attrs['save']) & set(attrs['unsave'])
+        if overlap:
+            raise serializers.ValidationError(f'Ids cannot be both saved and unsaved: {sorted(overlap)}')
+        return attrs
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, geo, search
+from .models import House
+
+
+# Fill in coordinates and geohash from the address before every save
+@receiver(pre_save, sender=House)
+def locate_house(sender, instance, raw=False, **kwargs):
+    if not raw:
+        geo.locate(instance)
+
+
+# Keep the SQLite full-text index and the listings response cache in step with House writes
+@receiver(post_save, sender=House)
+def index_house(sender, instance, **kwargs):
+    search.index_houses([instance])
+    cache.bump_version()
+
+
+@receiver(post_delete, sender=House)
+def unindex_house(sender, instance, **kwargs):
+    search.remove_houses([instance.oid])
+    cache.bump_version()
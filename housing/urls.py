@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from django.contrib.auth import views as auth_views
-from . import views
+from . import async_views, views
 
 # Router for ViewSet-based API endpoints
 router = DefaultRouter()
@@ -14,6 +14,12 @@ urlpatterns = [
     # Saved listings API endpoints
     path('api/saved/', views.SavedListingsView.as_view(), name='saved-listings'),
     path('api/saved/<int:house_id>/', views.SavedListingsView.as_view(), name='unsave-listing'),
+    path('api/saved/bulk/', views.SavedListingsBulkView.as_view(), name='saved-listings-bulk'),
+
+    # Async (ASGI) versions of the read endpoints above, see housing/async_views.py
+    path('api/async/listings/', async_views.listings_list, name='async-listings-list'),
+    path('api/async/listings/<int:pk>/', async_views.listing_detail, name='async-listings-detail'),
+    path('api/async/saved/', async_views.saved_list, name='async-saved-listings'),
     
     # Shows user's saved houses
     path('savedRead', views.savedRead_view, name='savedRead_url'),
@@ -1,14 +1,25 @@
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from .models import House, SavedHouse
 from .forms import HouseForm
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import viewsets
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
-from .serializer import HouseSerializer, SavedHouseSerializer
+from .serializer import HouseSerializer, SavedHouseSerializer, SavedHouseBulkSerializer
+from .pagination import ListingsCursorPagination, SavedCursorPagination, SearchPagination
+from .filters import ListingsFilterBackend, parse_id_list
+from . import cache as listings_cache
+from . import ingest
+from . import fast_serializer
+from . import popularity
+from .conditional import batch_validators, conditional_response, detail_validators, list_validators
+from .retry import retry_on_db_lock
+from main.db_router import ReplicaReadMixin
+from main.throttling import IPTokenBucketThrottle, UserTokenBucketThrottle
 from django.contrib.auth.forms import AuthenticationForm,  UserCreationForm
 from django.contrib.auth.models import User
 from django.contrib.auth import login, authenticate
@@ -18,40 +29,183 @@ from django.contrib.auth.views import PasswordResetView
 from django import forms
 from django.shortcuts import render, redirect
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 
 #  ViewSet for managing house listings via REST API.
-class ListingsViewSet(viewsets.ModelViewSet):
+class ListingsViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = House.objects.all().order_by('-oid')
     serializer_class = HouseSerializer
     permission_classes = [AllowAny]
-
+    pagination_class = ListingsCursorPagination
+    filter_backends = [ListingsFilterBackend]
+
+    # Actions that honour ?fields=a,b,c and ?view=card
+    sparse_actions = ('list', 'retrieve', 'search', 'batch')
+
+    # Writes are token-bucket throttled per IP and per user (see main/throttling.py)
+    throttle_scope = 'listings_write'
+    write_actions = ('create', 'update', 'partial_update', 'destroy', 'bulk_import')
+
+    def get_requested_fields(self):
+        """Fields asked for with ?view=card or ?fields=..., or None for every field."""
+        if self.action not in self.sparse_actions:
+            return None
+        return HouseSerializer.requested_fields(self.request.query_params)
+
+    def get_throttles(self):
+        if self.action in self.write_actions:
+            return [IPTokenBucketThrottle(), UserTokenBucketThrottle()]
+        return super().get_throttles()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        # Only read the requested columns (the oid primary key is always loaded)
+        return queryset.only(*fields) if fields else queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    # list and retrieve answer conditional GETs with 304 (see housing/conditional.py),
+    # then fall back to the versioned response cache (see housing/cache.py)
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        return conditional_response(
+            self, request, list_validators, self._cached_list, *args, **kwargs
+        )
 
+    def _cached_list(self, request, *args, **kwargs):
+        return listings_cache.cached_response(self, request, self._fast_list, *args, **kwargs)
+
+    # Same output as ModelViewSet.list, but reads .values() rows and skips DRF's
+    # per-field machinery (see housing/fast_serializer.py)
+    def _fast_list(self, request, *args, **kwargs):
+        fields = self.get_requested_fields()
+        queryset = self.filter_queryset(self.get_queryset())
+        # The paginator keys on its ordering columns, so fetch them even when they weren't requested
+        ordering = [name.lstrip('-') for name in self.paginator.get_ordering(request, queryset, self)]
+        rows = queryset.values(*{*ordering, *fast_serializer.house_value_fields(fields)})
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(fast_serializer.serialize_houses(rows, fields))
+        return self.get_paginated_response(fast_serializer.serialize_houses(page, fields))
+
+    # The write and its post_save indexing are one transaction, so a retry after a
+    # lock error in either can't leave a second copy of the listing behind
+    @retry_on_db_lock()
     def create(self, request, *args, **kwargs):
-        return super().create(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().create(request, *args, **kwargs)
 
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
+        return conditional_response(
+            self, request, detail_validators, self._cached_retrieve, *args, **kwargs
+        )
+
+    def _cached_retrieve(self, request, *args, **kwargs):
+        return listings_cache.cached_response(self, request, super().retrieve, *args, **kwargs)
 
+    @retry_on_db_lock()
     def update(self, request, *args, **kwargs):
-        return super().update(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
 
+    @retry_on_db_lock()
     def partial_update(self, request, *args, **kwargs):
-        return super().partial_update(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().partial_update(request, *args, **kwargs)
 
+    @retry_on_db_lock()
     def destroy(self, request, *args, **kwargs):
-        return super().destroy(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
+
+    # GET /api/listings/search/?q=... - ranked full-text search over address and description
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = SearchPagination()
+        oids = paginator.paginate_search(query, request)
+        houses = self.get_queryset().in_bulk(oids)
+        ranked = [houses[oid] for oid in oids if oid in houses]
+        serializer = self.get_serializer(ranked, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    # GET /api/listings/batch/?ids=3,1,2 - several listings in the requested order, from one query
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        return conditional_response(self, request, batch_validators, self._cached_batch)
+
+    def _cached_batch(self, request):
+        return listings_cache.cached_response(self, request, self._batch)
+
+    def _batch(self, request):
+        ids = self.get_batch_ids()
+        houses = self.get_queryset().in_bulk(ids)
+        found = dict(zip(houses, self.get_serializer(list(houses.values()), many=True).data))
+        return Response({
+            'results': [found.get(oid) for oid in ids],
+            'missing': [oid for oid in ids if oid not in found],
+        })
+
+    def get_batch_ids(self):
+        """The ?ids= of a batch request, duplicates dropped; 400 if there are none or too many."""
+        ids = list(dict.fromkeys(parse_id_list(self.request.query_params.get('ids', ''), 'ids')))
+        if not ids:
+            raise ValidationError({'ids': 'Expected a comma separated list of integers.'})
+        if len(ids) > settings.LISTINGS_MAX_PAGE_SIZE:
+            raise ValidationError({'ids': f'At most {settings.LISTINGS_MAX_PAGE_SIZE} ids per request.'})
+        return ids
+
+    # POST /api/listings/import/ - bulk upsert from a CSV (text/csv) or NDJSON (application/x-ndjson) body
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAuthenticated])
+    def bulk_import(self, request):
+        content_type = request.content_type.split(';')[0].strip()
+        formats = {value: key for key, value in ingest.CONTENT_TYPES.items()}
+        formats['application/jsonl'] = 'ndjson'
+        fmt = formats.get(content_type)
+        if fmt is None:
+            return Response(
+                {'error': 'Send text/csv or application/x-ndjson'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        lines = (line.decode('utf-8') for line in request.stream or [])
+        result = ingest.import_rows(ingest.read_rows(lines, fmt))
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+    # GET /api/listings/export/?type=csv|ndjson - streams the whole table
+    @action(detail=False, methods=['get'], url_path='export', permission_classes=[IsAuthenticated])
+    def bulk_export(self, request):
+        fmt = request.query_params.get('type', 'ndjson')
+        if fmt not in ingest.FORMATS:
+            return Response({'error': 'type must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(ingest.export_lines(fmt), content_type=ingest.CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="listings.{fmt}"'
+        return response
+
+    # GET /api/listings/cache-stats/ - hit/miss counters for the response cache (admins only)
+    @action(detail=False, methods=['get'], url_path='cache-stats', permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        return Response(listings_cache.stats(), status=status.HTTP_200_OK)
 
 # API endpoint for managing saved listings.
-class SavedListingsView(APIView):
+class SavedListingsView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        saved_houses = SavedHouse.objects.filter(user=request.user)
-        serializer = SavedHouseSerializer(saved_houses, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Saved rows and their houses come back from one joined .values() query
+        saved_houses = SavedHouse.objects.filter(user=request.user).values(
+            *fast_serializer.saved_house_value_fields()
+        )
+        paginator = SavedCursorPagination()
+        page = paginator.paginate_queryset(saved_houses, request, view=self)
+        return paginator.get_paginated_response(fast_serializer.serialize_saved_houses(page))
     
+    @retry_on_db_lock()
     def post(self, request):
         house_id = request.data.get('house_id')
         if not house_id:
@@ -69,10 +223,13 @@ class SavedListingsView(APIView):
             )
         
         # Check if already saved
-        saved_house, created = SavedHouse.objects.get_or_create(
-            user=request.user,
-            house=house
-        )
+        with transaction.atomic():
+            saved_house, created = SavedHouse.objects.get_or_create(
+                user=request.user,
+                house=house
+            )
+            if created:
+                popularity.adjust([house.oid], +1)
         
         if created:
             serializer = SavedHouseSerializer(saved_house)
@@ -83,6 +240,7 @@ class SavedListingsView(APIView):
                 status=status.HTTP_200_OK
             )
     
+    @retry_on_db_lock()
     def delete(self, request, house_id=None):
         """Unsave a listing for the current user"""
         if not house_id:
@@ -99,7 +257,9 @@ class SavedListingsView(APIView):
                 user=request.user,
                 house__oid=house_id
             )
-            saved_house.delete()
+            with transaction.atomic():
+                saved_house.delete()
+                popularity.adjust([saved_house.house_id], -1)
             return Response(
                 {'message': 'Listing unsaved successfully'}, 
                 status=status.HTTP_200_OK
@@ -110,6 +270,44 @@ class SavedListingsView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+# API endpoint for saving / unsaving many listings in one request.
+# POST {"save": [1, 2], "unsave": [3]} -> {"results": [{"house_id": 1, "status": "saved"}, ...]}
+# Statuses: saved, already_saved, not_found, unsaved, not_saved
+class SavedListingsBulkView(ReplicaReadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    @retry_on_db_lock()
+    def post(self, request):
+        serializer = SavedHouseBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        save_ids = list(dict.fromkeys(serializer.validated_data['save']))
+        unsave_ids = list(dict.fromkeys(serializer.validated_data['unsave']))
+        statuses = {}
+
+        with transaction.atomic():
+            if save_ids:
+                existing = set(House.objects.filter(oid__in=save_ids).values_list('oid', flat=True))
+                # Only the rows this request inserted count as saved (and add to save_count)
+                inserted = popularity.save_all(request.user, [house_id for house_id in save_ids if house_id in existing])
+                for house_id in save_ids:
+                    if house_id not in existing:
+                        statuses[house_id] = 'not_found'
+                    elif house_id in inserted:
+                        statuses[house_id] = 'saved'
+                    else:
+                        statuses[house_id] = 'already_saved'
+
+            if unsave_ids:
+                saved = SavedHouse.objects.filter(user=request.user, house_id__in=unsave_ids)
+                was_saved = set(saved.values_list('house_id', flat=True))
+                saved.delete()
+                popularity.adjust(was_saved, -1)
+                for house_id in unsave_ids:
+                    statuses[house_id] = 'unsaved' if house_id in was_saved else 'not_saved'
+
+        results = [{'house_id': house_id, 'status': outcome} for house_id, outcome in statuses.items()]
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
 # Shows saved houses for the current user
 def savedRead_view(request):
     obj = House.objects.all()
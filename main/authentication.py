@@ -0,0 +1,113 @@
+"""
+JWT authentication with a per-process cache of verified tokens.
+
+simplejwt's JWTAuthentication decodes and verifies the token and then looks the user
+up on every request, even when a client sends the same access token many times a
+second. CachedJWTAuthentication remembers raw token -> user in a bounded LRU, so a
+repeated token skips both the signature check and the User query.
+
+An entry lives for JWT_AUTH_CACHE_TTL seconds at most, and never past the token's
+own "exp". Entries for a user are dropped when that user is saved or deleted (a
+password change or deactivation takes effect immediately) and when they log out
+through auth.views.LogoutView. The cache is per worker process: a change made in
+another process reaches this one within the TTL.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+class TokenUserCache:
+    # Thread-safe LRU of raw token -> (user, validated token), with per-entry expiry
+
+    timer = time.time
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, raw_token):
+        with self._lock:
+            entry = self._entries.get(raw_token)
+            if entry is None:
+                return None
+            if entry[2] <= self.timer():
+                del self._entries[raw_token]
+                return None
+            self._entries.move_to_end(raw_token)
+            return entry[0], entry[1]
+
+    def set(self, raw_token, user, validated_token, expires_at):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[raw_token] = (user, validated_token, expires_at)
+            self._entries.move_to_end(raw_token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def forget_user(self, user_id):
+        """Drops every cached token of ``user_id``; returns how many there were."""
+        user_id = str(user_id)
+        with self._lock:
+            stale = [
+                raw_token for raw_token, (user, _, _) in self._entries.items()
+                if str(getattr(user, jwt_settings.USER_ID_FIELD)) == user_id
+            ]
+            for raw_token in stale:
+                del self._entries[raw_token]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenUserCache(settings.JWT_AUTH_CACHE_SIZE)
+
+
+def forget_user(user_id):
+    return token_cache.forget_user(user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        # Requests get shallow copies, so attributes set on request.user don't leak
+        # into the cached user or other requests
+        cached = token_cache.get(raw_token)
+        if cached is not None:
+            user, validated_token = cached
+            return copy.copy(user), validated_token
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
+        expires_at = min(validated_token['exp'], token_cache.timer() + settings.JWT_AUTH_CACHE_TTL)
+        token_cache.set(raw_token, user, validated_token, expires_at)
+        return copy.copy(user), validated_token
+
+
+# Saving a user can deactivate them or change their password, so re-check their tokens
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_changed_user(sender, instance, **kwargs):
+    forget_user(getattr(instance, jwt_settings.USER_ID_FIELD))
@@ -0,0 +1,177 @@
+"""
+Bloom filter in front of simplejwt's refresh token blacklist.
+
+Refreshing an access token checks the refresh token's jti against BlacklistedToken,
+which is one query per refresh, and nearly every answer is "not blacklisted". Each
+worker process keeps a Bloom filter of the blacklisted jtis that haven't expired
+yet. A jti the filter doesn't contain is certainly not blacklisted, so the query
+only runs for jtis the filter does contain: real logouts, and rare false positives.
+
+The filter is rebuilt from the database every BLACKLIST_BLOOM_REBUILD seconds, which
+also drops tokens that have since expired. A logout adds its jti to the filter in
+its own process straight away. Every new BlacklistedToken row also bumps a version
+in Django's cache once it commits, and other processes read the rows added since their last sync
+before their next check. That only works if the cache is shared between processes:
+with a per-process one (LocMem, the default, or Dummy) the filter is skipped and
+every refresh queries the blacklist.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .caching import cache_is_shared
+
+VERSION_KEY = 'jwt:blacklist:version'
+
+
+class BloomFilter:
+    # Fixed-size set of strings with no false negatives and about ``error_rate`` false positives
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.bits = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.bits / capacity * math.log(2)), 1)
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.bits for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 0, None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+def _bump_shared_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+class BlacklistFilter:
+    # This process's view of the blacklist: a Bloom filter plus what it was last synced to
+
+    timer = time.monotonic
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = None
+        self._last_id = 0
+        self._version = None
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+    def _rows(self, after_id=0):
+        return (
+            BlacklistedToken.objects
+            .filter(pk__gt=after_id, token__expires_at__gt=timezone.now())
+            .values_list('pk', 'token__jti')
+            .order_by('pk')
+        )
+
+    def _sync(self):
+        version = _shared_version()
+        now = self.timer()
+        if self._bloom is None or now - self._built_at >= settings.BLACKLIST_BLOOM_REBUILD:
+            rows = list(self._rows().iterator())
+            # Room for twice the current size, so new logouts don't degrade it before the next rebuild
+            bloom = BloomFilter(2 * len(rows) + settings.BLACKLIST_BLOOM_MIN_CAPACITY, settings.BLACKLIST_BLOOM_ERROR_RATE)
+            self._built_at = now
+            self._last_id = 0
+        elif version != self._version:
+            rows = list(self._rows(self._last_id).iterator())
+            bloom = self._bloom
+        else:
+            return
+        for pk, jti in rows:
+            bloom.add(jti)
+            self._last_id = max(self._last_id, pk)
+        self._bloom = bloom
+        self._version = version
+
+    def might_contain(self, jti):
+        """False only if ``jti`` is certainly not blacklisted."""
+        if not cache_is_shared():
+            return True
+        with self._lock:
+            self._sync()
+            return jti in self._bloom
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+
+blacklist_filter = BlacklistFilter()
+
+
+# However a token gets blacklisted (logout, admin, shell), tell the other processes.
+# Only once the row has committed: a process that synced on the new version before the
+# row was visible would move its last id past it and accept the token until a rebuild.
+@receiver(post_save, sender=BlacklistedToken)
+def bump_blacklist_version(sender, created, **kwargs):
+    if created:
+        transaction.on_commit(_bump_shared_version)
+
+
+class BloomRefreshToken(RefreshToken):
+    # RefreshToken that only asks the database about jtis the Bloom filter may contain
+
+    def check_blacklist(self):
+        if blacklist_filter.might_contain(self.payload[jwt_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[jwt_settings.JTI_CLAIM])
+        return result
+
+
+def prune_expired(batch_size=1000):
+    """Deletes expired outstanding tokens and their blacklist rows in pk batches; returns the count."""
+    pruned, now = 0, timezone.now()
+    while True:
+        pks = list(
+            OutstandingToken.objects.filter(expires_at__lte=now).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return pruned
+        BlacklistedToken.objects.filter(token_id__in=pks).delete()
+        OutstandingToken.objects.filter(pk__in=pks).delete()
+        pruned += len(pks)
+
+
+# SIMPLE_JWT["TOKEN_REFRESH_SERIALIZER"], used by auth/jwt/refresh/
+class BloomTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = BloomRefreshToken
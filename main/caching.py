@@ -0,0 +1,17 @@
+"""
+Which Django cache backends other worker processes can see.
+
+Several features keep cross-process state in the default cache: the listings version
+behind list ETags (housing/conditional.py), the token blacklist version
+(main/blacklist.py), and read-your-writes pins (main/db_router.py). They only work if
+a write in one process is visible to the others. LocMem keeps a separate copy in
+each process, and Dummy keeps nothing.
+"""
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_shared(alias=DEFAULT_CACHE_ALIAS):
+    """Whether other processes see this one's writes to the ``alias`` cache."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
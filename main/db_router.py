@@ -0,0 +1,109 @@
+"""
+Read-replica routing.
+
+Reads made by views that opt in with ReplicaReadMixin go to one of the aliases in
+settings.DATABASE_REPLICAS; everything else, and every write, uses "default".
+After a client writes, its reads stay on the primary for REPLICA_STICKY_SECONDS so it
+always sees its own changes despite replication lag. Clients are identified by user
+id when authenticated and by IP address otherwise. The pin is kept in the default
+cache, so with replicas that cache must be shared by every worker process (a client
+may write through one and read through another); check_configuration() enforces that
+at startup.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+
+from .caching import cache_is_shared
+
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+def replica_reads_enabled():
+    return _replica_reads.get()
+
+
+def _sticky_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'replica:sticky:user:{user.pk}'
+    return f'replica:sticky:ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def mark_write(request):
+    """Pins the client's reads to the primary for the next REPLICA_STICKY_SECONDS."""
+    cache.set(_sticky_key(request), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def recently_wrote(request):
+    return cache.get(_sticky_key(request), False)
+
+
+def check_configuration():
+    """Raises ImproperlyConfigured if replicas are set up without a shared cache for the pins."""
+    if settings.DATABASE_REPLICAS and not cache_is_shared():
+        raise ImproperlyConfigured(
+            'DATABASE_REPLICAS needs a cache shared between processes for read-your-writes '
+            'pinning; set CACHE_BACKEND to a file, database, Redis or Memcached cache.'
+        )
+
+
+def _reads_from_replica(request):
+    return request.method in SAFE_METHODS and settings.DATABASE_REPLICAS and not recently_wrote(request)
+
+
+@contextmanager
+def replica_reads(request):
+    """For plain (e.g. async) views: reads inside the block go to a replica when allowed."""
+    token = _replica_reads.set(True) if _reads_from_replica(request) else None
+    try:
+        yield
+    finally:
+        if token is not None:
+            _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and replica_reads_enabled():
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db == 'default'
+
+
+class ReplicaReadMixin:
+    """
+    For DRF views: safe-method requests read from a replica unless the client wrote
+    recently; successful unsafe-method requests pin the client to the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if _reads_from_replica(request):
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        if request.method not in SAFE_METHODS and response.status_code < 400 and settings.DATABASE_REPLICAS:
+            mark_write(request)
+        return super().finalize_response(request, response, *args, **kwargs)
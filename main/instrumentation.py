@@ -0,0 +1,197 @@
+"""
+Per-request instrumentation: wall time, DB query count/time, serializer and render
+time, and response size, recorded per view.
+
+InstrumentationMiddleware (main/middleware.py) starts a RequestMetrics for each
+request in a context variable. A ``connection.execute_wrapper`` hook, installed on
+every DB connection, and ``timer()`` blocks add to it, and the middleware reports the
+totals in a ``Server-Timing`` header and in the in-process Prometheus registry
+served at /metrics. Context variables follow the request into sync_to_async threads,
+so async views are measured too.
+
+With settings.INSTRUMENTATION off the middleware removes itself, no hook is
+installed, and ``timer()`` costs one context variable lookup.
+
+The registry lives in each worker process's memory, so with several workers each
+scrape of /metrics sees only the worker that answered it.
+"""
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+# Prometheus' default latency buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_seconds', 'timings')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        # name -> seconds, for timer() blocks ("serialize", "render", ...)
+        self.timings = defaultdict(float)
+
+
+def current():
+    """The RequestMetrics of the request being handled, or None."""
+    return _current.get()
+
+
+def start():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timer(name):
+    """Adds the time spent in the block to the current request's ``name`` timing."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += time.perf_counter() - started
+
+
+def timed(name):
+    """Decorator form of timer()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_seconds += time.perf_counter() - started
+
+
+def _install_hook(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_hook():
+    """Counts the queries of every DB connection, including ones already open."""
+    connection_created.connect(_install_hook, dispatch_uid='main.instrumentation')
+    for connection in connections.all(initialized_only=True):
+        _install_hook(None, connection)
+
+
+class _Series:
+    __slots__ = ('buckets', 'count', 'seconds', 'queries', 'db_seconds', 'timings', 'response_bytes')
+
+    def __init__(self):
+        # One slot per bucket plus +Inf; not cumulative until rendered
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.timings = defaultdict(float)
+        self.response_bytes = 0
+
+
+class Registry:
+    """Latency histograms and counters per (view, method, status)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def observe(self, labels, seconds, metrics, response_bytes):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = _Series()
+            series.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            series.count += 1
+            series.seconds += seconds
+            series.queries += metrics.queries
+            series.db_seconds += metrics.db_seconds
+            for name, value in metrics.timings.items():
+                series.timings[name] += value
+            series.response_bytes += response_bytes
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        with self.lock:
+            return self._render(sorted(self.series.items()))
+
+    def _render(self, series):
+        lines = [
+            '# HELP http_request_duration_seconds Wall time of each request.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (view, method, status), s in series:
+            labels = f'view="{view}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, '+Inf'), s.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {s.seconds}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {s.count}')
+
+        counters = [
+            ('http_request_db_queries_total', 'DB queries run by requests.', lambda s, t: s.queries),
+            ('http_request_db_seconds_total', 'Time spent in DB queries.', lambda s, t: s.db_seconds),
+            ('http_request_serialize_seconds_total', 'Time spent serializing.', lambda s, t: t.get('serialize', 0.0)),
+            ('http_request_render_seconds_total', 'Time spent rendering responses.', lambda s, t: t.get('render', 0.0)),
+            ('http_response_bytes_total', 'Response body bytes (not streamed ones).', lambda s, t: s.response_bytes),
+        ]
+        for name, help_text, value in counters:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (view, method, status), s in series:
+                lines.append(f'{name}{{view="{view}",method="{method}",status="{status}"}} {value(s, s.timings)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def server_timing(total_seconds, metrics):
+    """Server-Timing header value, durations in milliseconds."""
+    parts = [f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.queries} queries"']
+    parts += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in metrics.timings.items()]
+    parts.append(f'total;dur={total_seconds * 1000:.2f}')
+    return ', '.join(parts)
+
+
+def metrics_view(request):
+    """GET /metrics for Prometheus; only from METRICS_ALLOWED_IPS, 404 when disabled."""
+    if not settings.INSTRUMENTATION or request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
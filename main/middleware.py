@@ -1,14 +1,91 @@
-class DisableSSLRedirectForLocalhost:
-    def __init__(self, get_response):
-        self.get_response = get_response
+import time
 
-    def __call__(self, request):
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+
+from . import instrumentation, query_inspector
+
+
+# MiddlewareMixin makes this work natively under both WSGI and ASGI, so requests to
+# async views don't have to hop to a thread just to run this middleware.
+class DisableSSLRedirectForLocalhost(MiddlewareMixin):
+    def process_request(self, request):
         # Check if request is from localhost
         remote_addr = request.META.get('REMOTE_ADDR', '')
         if remote_addr in ['127.0.0.1', 'localhost', '::1']:
             # Temporarily disable SSL redirect for localhost
             request._dont_enforce_csrf_checks = False
             request.META['HTTP_X_FORWARDED_PROTO'] = 'https'
-        
-        response = self.get_response(request)
+
+
+# Records wall time, DB queries, serializer/render time and response size per view,
+# sent back as a Server-Timing header and exported at /metrics (see main/instrumentation.py).
+# Removes itself from the middleware chain unless settings.INSTRUMENTATION is on.
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        instrumentation.install_query_hook()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        metrics, token = instrumentation.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        metrics, token = instrumentation.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.stop(token)
+        return self.finish(request, response, metrics, started)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that step as "render"
+        metrics = instrumentation.current()
+        if metrics is not None:
+            render_started = time.perf_counter()
+
+            def rendered(response):
+                metrics.timings['render'] += time.perf_counter() - render_started
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, metrics, started):
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        view = (match.view_name or match._func_path) if match else 'unmatched'
+        size = 0 if response.streaming else len(response.content)
+        instrumentation.registry.observe((view, request.method, response.status_code), elapsed, metrics, size)
+        response['Server-Timing'] = instrumentation.server_timing(elapsed, metrics)
         return response
+
+
+# Development/CI mode: logs (or raises on, with QUERY_INSPECTOR_RAISE) N+1 and slow
+# queries for each request, see main/query_inspector.py. Inactive unless QUERY_INSPECTOR is on.
+class QueryInspectorMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        label = f'{request.method} {request.path}'
+        with query_inspector.inspect(label, raise_on_findings=settings.QUERY_INSPECTOR_RAISE):
+            return self.get_response(request)
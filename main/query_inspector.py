@@ -0,0 +1,90 @@
+"""
+Development/CI check for N+1 queries and slow queries.
+
+``inspect()`` wraps every DB connection with ``connection.execute_wrapper`` and,
+when the block ends, reports:
+
+* n_plus_one - the same SQL shape ran more than QUERY_INSPECTOR_REPEAT_THRESHOLD
+  times, e.g. one house lookup per saved listing instead of a join;
+* slow_query - a single query took longer than QUERY_INSPECTOR_SLOW_MS.
+
+The shape of a query is its SQL with IN (...) lists of any length collapsed, so
+``WHERE id IN (%s, %s)`` and ``WHERE id IN (%s)`` count as the same query.
+
+Findings are logged as one JSON object per line on the "main.query_inspector"
+logger. With ``raise_on_findings`` (QUERY_INSPECTOR_RAISE for the middleware) they
+raise QueryInspectionError instead, which fails the test that made the request.
+QueryInspectorMiddleware (main/middleware.py) applies this to every request when
+QUERY_INSPECTOR is on.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\bIN \(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryInspectionError(AssertionError):
+    pass
+
+
+def sql_shape(sql):
+    return _WHITESPACE.sub(' ', _IN_LIST.sub('IN (...)', sql)).strip()
+
+
+class QueryInspector:
+    def __init__(self, repeat_threshold, slow_ms):
+        self.repeat_threshold = repeat_threshold
+        self.slow_ms = slow_ms
+        self.shapes = Counter()
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            self.shapes[sql_shape(sql)] += 1
+            if self.slow_ms is not None and duration_ms > self.slow_ms:
+                self.slow.append({'sql': sql, 'duration_ms': round(duration_ms, 2)})
+
+    def findings(self):
+        found = [
+            {'kind': 'n_plus_one', 'sql': shape, 'count': count}
+            for shape, count in self.shapes.items()
+            if self.repeat_threshold is not None and count > self.repeat_threshold
+        ]
+        found += [{'kind': 'slow_query', **query} for query in self.slow]
+        return found
+
+
+@contextmanager
+def inspect(label='', repeat_threshold=None, slow_ms=None, raise_on_findings=False):
+    """Watches the queries run in the block; thresholds default to the settings."""
+    if repeat_threshold is None:
+        repeat_threshold = settings.QUERY_INSPECTOR_REPEAT_THRESHOLD
+    if slow_ms is None:
+        slow_ms = settings.QUERY_INSPECTOR_SLOW_MS
+    inspector = QueryInspector(repeat_threshold, slow_ms)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+
+    findings = inspector.findings()
+    for finding in findings:
+        logger.warning(json.dumps({'label': label, **finding}, sort_keys=True))
+    if findings and raise_on_findings:
+        raise QueryInspectionError(
+            f'{label}: ' + '; '.join(f"{f['kind']}: {f['sql']}" for f in findings)
+        )
@@ -18,7 +18,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 from django.urls import reverse_lazy
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -73,6 +73,10 @@ CRISPY_TEMPLATE_PACK = 'bootstrap5'
 
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole request; inactive unless INSTRUMENTATION=true
+    "main.middleware.InstrumentationMiddleware",
+    # Development/CI only: flags N+1 and slow queries per request (QUERY_INSPECTOR=true)
+    "main.middleware.QueryInspectorMiddleware",
     "main.middleware.DisableSSLRedirectForLocalhost",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -107,6 +111,7 @@ TEMPLATES = [
 
 
 WSGI_APPLICATION = "main.wsgi.application"
+ASGI_APPLICATION = "main.asgi.application"
 
 
 
@@ -122,8 +127,27 @@ if USE_SQLITE:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {},
         }
     }
+
+    # Production tuning for SQLite, applied to every new connection via init_command:
+    # WAL lets readers run while a write is in progress, synchronous=NORMAL is safe
+    # under WAL, mmap/cache sizes keep hot pages in memory and busy_timeout makes
+    # writers wait for a lock instead of failing. IMMEDIATE transactions take the
+    # write lock up front, so a transaction never fails half way when upgrading to it.
+    if config("SQLITE_TUNING", default=True, cast=bool):
+        SQLITE_PRAGMAS = {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": config("SQLITE_MMAP_SIZE", default=128 * 1024 * 1024, cast=int),
+            "cache_size": config("SQLITE_CACHE_SIZE", default=-20000, cast=int),  # negative = KiB
+            "busy_timeout": config("SQLITE_BUSY_TIMEOUT", default=5000, cast=int),  # ms
+        }
+        DATABASES["default"]["OPTIONS"] = {
+            "init_command": "; ".join(f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()),
+            "transaction_mode": "IMMEDIATE",
+        }
 else:
     DATABASES = {
         "default": {
@@ -133,8 +157,77 @@ else:
             "PASSWORD": config("DB_PASSWORD"),
             "HOST": config("DB_HOST"),
             "PORT": config("DB_PORT", "5432"),
+            # Keep connections open between requests instead of a new TCP + auth
+            # handshake per request; health checks drop connections that went away.
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+            "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+            "OPTIONS": {},
+        }
+    }
+
+    # Optional psycopg 3 connection pool shared by all threads of a worker process.
+    # Django requires CONN_MAX_AGE = 0 when pooling; the pool keeps connections warm instead.
+    if config("DB_POOL", default=False, cast=bool):
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+            "max_size": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+            "timeout": config("DB_POOL_TIMEOUT", default=10, cast=int),
         }
+
+
+
+
+# Optional read replica
+# Set SQLITE_REPLICA_PATH (SQLite) or DB_REPLICA_HOST (Postgres, same credentials as the
+# primary) to add a "replica" alias. Listing and saved-listing reads then go to the
+# replica, except for clients that wrote within the last REPLICA_STICKY_SECONDS.
+# That needs a CACHE_BACKEND shared between processes (below). See main/db_router.py.
+
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=5, cast=int)
+
+_replica_overrides = None
+if USE_SQLITE and config("SQLITE_REPLICA_PATH", default=""):
+    _replica_overrides = {"NAME": config("SQLITE_REPLICA_PATH")}
+elif not USE_SQLITE and config("DB_REPLICA_HOST", default=""):
+    _replica_overrides = {"HOST": config("DB_REPLICA_HOST")}
+if _replica_overrides is not None:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        **_replica_overrides,
+        # Replicas are read-only, so they don't need to take the write lock up front
+        "OPTIONS": {
+            name: value for name, value in DATABASES["default"]["OPTIONS"].items() if name != "transaction_mode"
+        },
+        # Tests read the primary's test database through this alias
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS = ["replica"]
+    DATABASE_ROUTERS = ["main.db_router.ReplicaRouter"]
+
+
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Defaults to in-process memory; set CACHE_BACKEND to
+# django.core.cache.backends.filebased.FileBasedCache (and CACHE_LOCATION to a directory)
+# to share the listings response cache between worker processes.
+
+
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="slugnest"),
+        "OPTIONS": {
+            "MAX_ENTRIES": config("CACHE_MAX_ENTRIES", default=5000, cast=int),
+        },
     }
+}
+
+# Seconds a rendered listings response stays cached (writes invalidate it sooner)
+LISTINGS_CACHE_TIMEOUT = config("LISTINGS_CACHE_TIMEOUT", default=300, cast=int)
 
 
 
@@ -207,6 +300,8 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+# Bounds how long the outbox worker (manage.py send_outbox) waits on the mail server
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
 
 DEFAULT_FROM_EMAIL = DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='help@slugnest.org')
 EMAIL_SUBJECT_PREFIX = 'Password Recovery'
@@ -222,14 +317,59 @@ CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "main.authentication.CachedJWTAuthentication",
     ),
+    # Trusted reverse proxies in front of Django; throttles read the client IP from
+    # X-Forwarded-For only this many hops deep (0 = use REMOTE_ADDR, can't be spoofed)
+    "NUM_PROXIES": config("NUM_PROXIES", default=0, cast=int),
+    # Token bucket rates for main.throttling, keyed "<throttle_scope>_ip" / "<throttle_scope>_user"
+    "DEFAULT_THROTTLE_RATES": {
+        "recovery_ip": config("THROTTLE_RECOVERY_IP", default="5/hour"),
+        "auth_ip": config("THROTTLE_AUTH_IP", default="20/min"),
+        "listings_write_ip": config("THROTTLE_LISTINGS_WRITE_IP", default="60/min"),
+        "listings_write_user": config("THROTTLE_LISTINGS_WRITE_USER", default="30/min"),
+    },
 }
 
+# Geocoder used to fill in House.latitude/longitude (see housing/geo.py). The default
+# looks addresses up in a local CSV file with address,latitude,longitude columns.
+HOUSING_GEOCODER = config('HOUSING_GEOCODER', default='housing.geo.LookupTableGeocoder')
+GEOCODER_TABLE = config('GEOCODER_TABLE', default=str(BASE_DIR / 'housing' / 'geocode.csv'))
+
+# Per-request timing: Server-Timing headers and Prometheus metrics at /metrics
+# (see main/instrumentation.py). /metrics only answers the listed client addresses.
+INSTRUMENTATION = config("INSTRUMENTATION", default=False, cast=bool)
+METRICS_ALLOWED_IPS = config("METRICS_ALLOWED_IPS", default="127.0.0.1,::1", cast=Csv())
+
+# N+1 / slow query detection for development and CI (see main/query_inspector.py):
+# flags a request that runs one SQL shape more than REPEAT_THRESHOLD times or a query
+# slower than SLOW_MS; QUERY_INSPECTOR_RAISE turns findings into errors (fails tests).
+QUERY_INSPECTOR = config("QUERY_INSPECTOR", default=False, cast=bool)
+QUERY_INSPECTOR_RAISE = config("QUERY_INSPECTOR_RAISE", default=False, cast=bool)
+QUERY_INSPECTOR_REPEAT_THRESHOLD = config("QUERY_INSPECTOR_REPEAT_THRESHOLD", default=5, cast=int)
+QUERY_INSPECTOR_SLOW_MS = config("QUERY_INSPECTOR_SLOW_MS", default=100, cast=int)
+
+# Page sizes for the cursor-paginated listings API (?page_size= may ask for up to the max)
+LISTINGS_PAGE_SIZE = config('LISTINGS_PAGE_SIZE', default=24, cast=int)
+LISTINGS_MAX_PAGE_SIZE = config('LISTINGS_MAX_PAGE_SIZE', default=100, cast=int)
+
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Checks refresh tokens against the blacklist through a Bloom filter (see main/blacklist.py)
+    "TOKEN_REFRESH_SERIALIZER": "main.blacklist.BloomTokenRefreshSerializer",
 }
 
+# Per-process Bloom filter of blacklisted refresh tokens: rebuilt from the database
+# every BLACKLIST_BLOOM_REBUILD seconds, sized for at least MIN_CAPACITY tokens.
+BLACKLIST_BLOOM_REBUILD = config("BLACKLIST_BLOOM_REBUILD", default=60, cast=int)
+BLACKLIST_BLOOM_MIN_CAPACITY = config("BLACKLIST_BLOOM_MIN_CAPACITY", default=10000, cast=int)
+BLACKLIST_BLOOM_ERROR_RATE = config("BLACKLIST_BLOOM_ERROR_RATE", default=0.001, cast=float)
+
+# Verified access tokens remembered per worker process (see main/authentication.py).
+# An entry is dropped after the TTL in seconds, or earlier when the token expires.
+JWT_AUTH_CACHE_SIZE = config("JWT_AUTH_CACHE_SIZE", default=10000, cast=int)
+JWT_AUTH_CACHE_TTL = config("JWT_AUTH_CACHE_TTL", default=60, cast=int)
+
 DJOSER = {
     "PASSWORD_RESET_CONFIRM_URL": "auth/password/reset-password-confirmation/?uid={uid}&token={token}",
     "ACTIVATION_URL": "#/activate/{uid}/{token}",
@@ -0,0 +1,90 @@
+"""
+Token bucket throttling for DRF views.
+
+For a rate of "num/period", each client has a bucket of ``num`` tokens. The bucket
+refills continuously at num/period tokens per second. A request spends one token, and
+when the bucket is empty it gets 429 with a Retry-After header. The state is a single
+(tokens, timestamp) cache entry per client and scope, so every check is one cache read
+and one write, however high the rate. DRF's SimpleRateThrottle, by contrast, keeps
+one timestamp per request in the window.
+
+Views opt in with ``throttle_scope = "<scope>"`` plus these throttle classes. Rates
+come from REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] under "<scope>_ip" and
+"<scope>_user". A scope without a rate isn't throttled, and staff users never are.
+Like SimpleRateThrottle the read-modify-write isn't atomic, so two simultaneous
+requests from one client can occasionally both spend the last token.
+"""
+import time
+
+from django.core.cache import cache as default_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60): bucket size and the seconds it takes to refill completely."""
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    cache = default_cache
+    timer = time.time
+    # Rate key suffix, e.g. "ip" -> DEFAULT_THROTTLE_RATES["<scope>_ip"]
+    kind = None
+
+    def get_client_key(self, request):
+        """Identifies the client for this kind of bucket, or None to skip throttling."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return True
+
+        scope = getattr(view, 'throttle_scope', None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}_{self.kind}') if scope else None
+        client = self.get_client_key(request) if rate else None
+        if client is None:
+            return True
+
+        capacity, period = parse_rate(rate)
+        refill_per_second = capacity / period
+        key = f'throttle:{scope}_{self.kind}:{client}'
+        now = self.timer()
+        tokens, last = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * refill_per_second)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        else:
+            self.wait_seconds = (1 - tokens) / refill_per_second
+        # An untouched bucket is full again after one period, so the entry can expire then
+        self.cache.set(key, (tokens, now), period)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+# Per client IP address (honours REST_FRAMEWORK["NUM_PROXIES"] for X-Forwarded-For)
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_client_key(self, request):
+        return self.get_ident(request)
+
+
+# Per authenticated user; anonymous requests are left to the IP bucket
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    kind = 'user'
+
+    def get_client_key(self, request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return None
+        return user.pk
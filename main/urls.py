@@ -4,7 +4,8 @@ from django.urls import re_path
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
-from auth.views import LogoutView, PasswordRecoveryView
+from auth.views import LogoutView, PasswordRecoveryView, TokenCreateView
+from main.instrumentation import metrics_view
 
 
 schema_view = get_schema_view(
@@ -25,7 +26,10 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("housing.urls")),  # Include housing app URLs for regular views
     path("auth/", include("djoser.urls")),
+    # Listed before djoser.urls.jwt so the throttled view answers auth/jwt/create/
+    re_path(r"^auth/jwt/create/?", TokenCreateView.as_view(), name="jwt-create"),
     path("auth/", include("djoser.urls.jwt")),
     path("auth/logout/", LogoutView.as_view()),
     path("auth/recover/", PasswordRecoveryView.as_view()),
+    path("metrics", metrics_view, name="metrics"),
 ]